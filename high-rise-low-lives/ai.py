@@ -1,72 +1,95 @@
 from __future__ import annotations
+from typing import Optional
 import game_entities.actor
+import pathfinding
+
+
+def _acquire_target(src_actor: game_entities.actor.Actor) -> bool:
+    """Makes sure the actor is targeting a living enemy, picking the nearest one if not.
+    Returns whether the actor has a target."""
+
+    if src_actor.atk_target is None or src_actor.atk_target.health <= 0:
+        src_actor.atk_target = src_actor.game_entities.get_nearest_hostile(src_actor)
+
+    return src_actor.atk_target is not None
+
+
+def _step_along(src_actor: game_entities.actor.Actor, field: pathfinding.DijkstraMap) -> bool:
+    """Steps the actor downhill on a Dijkstra map, going around other actors that are in the way.
+    Returns whether the actor managed to do something."""
+
+    for (dx, dy) in field.get_steps(src_actor.x, src_actor.y):
+        # Don't bump into (and so attack) anyone other than the actor being chased.
+        blocker: game_entities.actor.Actor = src_actor.game_entities.get_actor_at(src_actor.x + dx, src_actor.y + dy)
+        if blocker is not None and blocker.health > 0 and blocker is not src_actor.atk_target:
+            continue
+
+        if src_actor.attempt_move(dx, dy):
+            return True
+
+    return False
+
+
+def _move_toward(src_actor: game_entities.actor.Actor, x: int, y: int) -> bool:
+    """Moves the actor one step along a path to any point on the map, ie: a patrol point, alarm or terminal.
+    Returns whether the actor managed to do something."""
+
+    pathfinder: pathfinding.Pathfinder = src_actor.game_entities.game_map.pathfinder
+    step: Optional[tuple[int, int]] = pathfinder.get_step((src_actor.x, src_actor.y), (x, y))
+    if step is None:
+        return False
+
+    # Wait for anyone in the way to move instead of bumping into (and so attacking) them.
+    blocker: game_entities.actor.Actor = src_actor.game_entities.get_actor_at(src_actor.x + step[0],
+                                                                              src_actor.y + step[1])
+    if blocker is not None and blocker.health > 0 and blocker is not src_actor.atk_target:
+        return False
+
+    return src_actor.attempt_move(step[0], step[1])
+
+
+def _chase(src_actor: game_entities.actor.Actor) -> bool:
+    """Moves the actor one step closer to its target. The player is chased using the chase field shared by every
+    chaser, anything else is chased along a path. Returns whether the actor managed to do something."""
+
+    if src_actor.atk_target is not src_actor.game_entities.player:
+        return _move_toward(src_actor, src_actor.atk_target.x, src_actor.atk_target.y)
+
+    chase_field: pathfinding.FlowField = src_actor.game_entities.game_map.chase_field
+    chase_field.aim_at(src_actor.atk_target.x, src_actor.atk_target.y)
+
+    return _step_along(src_actor, chase_field)
 
 
 def smart_melee(src_actor: game_entities.actor.Actor, game_actors: list[game_entities.actor.Actor]) -> None:
     """ For intelligent actors that like to fight up-close and personal.
     This is basic, temporary AI. """
 
-    # If not currently targeting an actor, find the player for now.
-    if src_actor.atk_target is None:
-        for entity in game_actors:
-            if isinstance(entity, game_entities.actor.Player):
-                src_actor.atk_target = entity
-                break
-
-    did_move: bool
-    # Simply attempt to move toward target, and stepping onto target attacks it.
-    if src_actor.x - src_actor.atk_target.x > 0:
-        did_move = src_actor.attempt_move(-1, 0)
-        if not did_move:
-            src_actor.attempt_move(0, 1)
-    elif src_actor.x - src_actor.atk_target.x < 0:
-        did_move = src_actor.attempt_move(1, 0)
-        if not did_move:
-            src_actor.attempt_move(0, 1)
-    if src_actor.y - src_actor.atk_target.y > 0:
-        did_move = src_actor.attempt_move(0, -1)
-        if not did_move:
-            src_actor.attempt_move(1, 0)
-    elif src_actor.y - src_actor.atk_target.y < 0:
-        did_move = src_actor.attempt_move(0, 1)
-        if not did_move:
-            src_actor.attempt_move(1, 0)
+    # If not currently targeting a living actor, go after the nearest enemy.
+    if not _acquire_target(src_actor):
+        src_actor.attempt_rest()
+        return
+
+    # Simply walk toward target along the shared chase field, and stepping onto target attacks it.
+    if not _chase(src_actor):
+        src_actor.attempt_rest()
 
 
 def smart_ranged(src_actor: game_entities.actor.Actor, game_actors: list[game_entities.actor.Actor]) -> None:
     """ For intelligent actors that like to fight from a distance.
     This is basic, temporary AI. """
 
-    # If not currently targeting an actor, find the player for now.
-    if src_actor.atk_target is None:
-        for entity in game_actors:
-            if isinstance(entity, game_entities.actor.Player):
-                src_actor.atk_target = entity
-                break
-
-    did_move: bool = False
-    # Simply attempt to move within range of target, and fire if close enough.
-    if src_actor.x - src_actor.atk_target.x > 5:
-        did_move = src_actor.attempt_move(-1, 0)
-        if not did_move:
-            src_actor.attempt_move(0, 1)
-    elif src_actor.x - src_actor.atk_target.x < 5:
-        did_move = src_actor.attempt_move(1, 0)
-        if not did_move:
-            src_actor.attempt_move(0, 1)
-    if src_actor.y - src_actor.atk_target.y > 5:
-        did_move = src_actor.attempt_move(0, -1)
-        if not did_move:
-            src_actor.attempt_move(1, 0)
-    elif src_actor.y - src_actor.atk_target.y < 5:
-        did_move = src_actor.attempt_move(0, 1)
-        if not did_move:
-            src_actor.attempt_move(1, 0)
-
-    if abs(src_actor.x - src_actor.atk_target.x) <= 5 and abs(src_actor.y - src_actor.atk_target.y) <= 5:
+    # If not currently targeting a living actor, go after the nearest enemy.
+    if not _acquire_target(src_actor):
+        src_actor.attempt_rest()
+        return
+
+    # Simply fire if close enough to see target, otherwise move within range.
+    if abs(src_actor.x - src_actor.atk_target.x) <= 5 and abs(src_actor.y - src_actor.atk_target.y) <= 5 and \
+            src_actor.can_see(src_actor.atk_target.x, src_actor.atk_target.y):
         bullet_path = src_actor.get_line_of_sight(src_actor.atk_target.x, src_actor.atk_target.y, True)
         src_actor.attempt_atk(src_actor.atk_target.x, src_actor.atk_target.y, True, bullet_path)
-    elif not did_move:
+    elif not _chase(src_actor):
         src_actor.attempt_rest()
 
 
@@ -74,15 +97,15 @@ def turret(src_actor: game_entities.actor.Actor, game_actors: list[game_entities
     """ For all stationary turrets.
     This is basic, temporary AI. """
 
-    # If not currently targeting an actor, find the player for now.
-    if src_actor.atk_target is None:
-        for entity in game_actors:
-            if isinstance(entity, game_entities.actor.Player):
-                src_actor.atk_target = entity
-                break
+    # Turrets can't move, so always aim at the nearest enemy of those within range.
+    src_actor.atk_target = min(
+        [actor_ for actor_ in src_actor.actors_in_range if src_actor.game_entities.is_hostile(src_actor, actor_)],
+        key=lambda actor_: max(abs(actor_.x - src_actor.x), abs(actor_.y - src_actor.y)),
+        default=None
+    )
 
     # Fix target prediction.
-    if abs(src_actor.atk_target.x - src_actor.x) < 5 and abs(src_actor.atk_target.y - src_actor.y) < 5:
+    if src_actor.atk_target is not None and src_actor.can_see(src_actor.atk_target.x, src_actor.atk_target.y):
         atk_x: int
         atk_y: int
         if src_actor.atk_target.dest_x == 0:
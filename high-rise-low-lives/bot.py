@@ -0,0 +1,155 @@
+from __future__ import annotations
+from typing import Callable, Optional
+import game_entities.actor
+import items
+import map
+
+
+class Bot:
+    """Plays as the player by itself, through the same attempt_* methods the keys end up calling, so a long game
+    without anyone at the keyboard goes down the same code paths as a real one.
+    Each turn the bot goes through its behaviours in order and the first one that finds something to do gets to do it,
+    resting if none do. Behaviours can be added, removed or reordered to change how it plays."""
+
+    def __init__(self, game_map: map.Map) -> None:
+        # Terminals that have been hacked, so they're left alone after.
+        self.hacked: set[tuple[int, int]] = set()
+        # Terminals there was no way to, left alone until something on the floor changes and there might be one.
+        self.unreachable: set[tuple[int, int]] = set()
+
+        self.behaviours: list[Callable[[game_entities.actor.Player], bool]] = [
+            self.fight,
+            self.wield,
+            self.pick_up,
+            self.hack,
+            self.explore
+        ]
+
+        # How far away a grenade gets thrown, and how close to get before firing (like the NPCs).
+        self.MAX_THROW_DISTANCE: int = 6
+        self.FIRE_DISTANCE: int = 5
+
+        game_map.cell_listeners.append(self.on_cell_changed)
+
+    def on_cell_changed(self, x: int, y: int) -> None:
+        """Called by the map when something changes at a cell, ie: a door is unlocked, which might open a way to
+        terminals that couldn't be reached."""
+
+        self.unreachable.clear()
+
+    @staticmethod
+    def _move_toward(player_: game_entities.actor.Player, x: int, y: int) -> bool:
+        """Takes a step along a path toward a cell, bumping into whatever is there when next to it (which attacks an
+        actor, opens a door or hacks a terminal). Returns whether the player managed to do something."""
+
+        step: Optional[tuple[int, int]] = player_.game_entities.game_map.pathfinder.get_step(
+            (player_.x, player_.y), (x, y)
+        )
+        if step is None:
+            return False
+
+        return player_.attempt_move(step[0], step[1])
+
+    def act(self, player_: game_entities.actor.Player) -> None:
+        """Picks what the player does this turn."""
+
+        for behaviour in self.behaviours:
+            if behaviour(player_):
+                return
+
+        player_.attempt_rest()
+
+    def fight(self, player_: game_entities.actor.Player) -> bool:
+        """Goes after the nearest enemy in sight: throws a grenade if it's far enough away not to get caught in the
+        blast, shoots if close enough, reloads when out of rounds and otherwise closes in to hit it."""
+
+        target: Optional[game_entities.actor.Actor] = player_.game_entities.get_nearest_hostile(player_, in_sight=True)
+        if target is None:
+            return False
+
+        distance: int = max(abs(target.x - player_.x), abs(target.y - player_.y))
+
+        for (_, slot) in player_.get_throwable_items():
+            blast_radius: int = getattr(slot["Item"], "blast_radius", 0)
+            if blast_radius < distance <= self.MAX_THROW_DISTANCE:
+                player_.attempt_throw(
+                    target.x, target.y, slot["Item"], player_.get_line_of_sight(target.x, target.y, False)
+                )
+                return True
+
+        weapon: Optional[items.Weapon] = player_.wielding
+        if isinstance(weapon, items.Weapon) and weapon.distance == "RANGED":
+            if weapon.rounds_in_mag > 0 and distance <= self.FIRE_DISTANCE:
+                player_.attempt_atk(target.x, target.y, True, player_.get_line_of_sight(target.x, target.y, True))
+                return True
+            if weapon.rounds_in_mag == 0 and player_.get_ammo_amount(weapon.caliber):
+                player_.attempt_reload()
+                return True
+
+        return self._move_toward(player_, target.x, target.y)
+
+    def wield(self, player_: game_entities.actor.Player) -> bool:
+        """Wields the best weapon being carried: a gun with ammo for it, or else whatever hits hardest."""
+
+        def rank(weapon: items.Weapon) -> tuple[bool, int]:
+            loaded: bool = weapon.distance == "RANGED" and \
+                bool(weapon.rounds_in_mag or player_.get_ammo_amount(weapon.caliber))
+            return loaded, weapon.dmg
+
+        weapons: list[items.Weapon] = [
+            slot["Item"] for (_, slot) in player_.get_wieldable_items() if isinstance(slot["Item"], items.Weapon)
+        ]
+        if not weapons:
+            return False
+
+        best: items.Weapon = max(weapons, key=rank)
+        if best is player_.wielding or \
+                (isinstance(player_.wielding, items.Weapon) and rank(player_.wielding) >= rank(best)):
+            return False
+
+        player_.attempt_wield(best)
+        return True
+
+    def pick_up(self, player_: game_entities.actor.Player) -> bool:
+        """Picks up whatever is underfoot."""
+
+        if not player_.game_entities.get_items_at(player_.x, player_.y):
+            return False
+
+        player_.attempt_pickup()
+        return True
+
+    def hack(self, player_: game_entities.actor.Player) -> bool:
+        """Heads for the nearest terminal that has been seen but not hacked yet, and hacks it."""
+
+        game_map = player_.game_entities.game_map
+        explored = game_map.fog.get_explored()
+        terminals: list = [
+            terminal_ for terminal_ in player_.game_entities.terminals
+            if (terminal_.x, terminal_.y) not in self.hacked and (terminal_.x, terminal_.y) not in self.unreachable and
+            explored[terminal_.x, terminal_.y]
+        ]
+        if not terminals:
+            return False
+
+        terminal_ = min(terminals, key=lambda nearest: abs(nearest.x - player_.x) + abs(nearest.y - player_.y))
+
+        # Bumping into it hacks it, so it's done with once the player is next to it.
+        if abs(terminal_.x - player_.x) + abs(terminal_.y - player_.y) == 1:
+            self.hacked.add((terminal_.x, terminal_.y))
+            return player_.attempt_move(terminal_.x - player_.x, terminal_.y - player_.y)
+
+        if not self._move_toward(player_, terminal_.x, terminal_.y):
+            self.unreachable.add((terminal_.x, terminal_.y))
+            return False
+
+        return True
+
+    def explore(self, player_: game_entities.actor.Player) -> bool:
+        """Heads for the nearest place not seen yet or item not picked up yet."""
+
+        direction: Optional[tuple[int, int]] = player_.game_entities.game_map.explorer.get_step(player_.x, player_.y)
+        if direction is None:
+            return False
+
+        return player_.attempt_move(direction[0], direction[1])
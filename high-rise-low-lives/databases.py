@@ -14,6 +14,7 @@ class Databases:
         self.power_sources: dict = {}
         self.misc_items: dict = {}
         self.ammo: dict = {}
+        self.factions: dict = {}
 
     def load_from_files(self) -> None:
         """Loads in data from JSON files and assigns to respective dictionaries
@@ -57,3 +58,7 @@ class Databases:
         # Misc items
         with open("data/ammo.dat") as data_file:
             self.ammo = json.load(data_file)
+
+        # Factions
+        with open("data/factions.dat") as data_file:
+            self.factions = json.load(data_file)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+from typing import Optional
+import heapq
+import math
+import numpy
+import map
+import pathfinding
+
+
+class FrontierMap(pathfinding.DijkstraMap):
+    """A Dijkstra map toward a set of goals that only ever shrinks, like the unexplored cells of a floor.
+    Each cell remembers which goal it is closest to, so when goals are removed only the cells that were closest to them
+    are flooded again, from the cells around them that still lead somewhere."""
+
+    def __init__(self, game_map: map.Map) -> None:
+        super().__init__(game_map)
+
+        # The goal each cell is closest to, indexed [x][y], and the cells closest to each goal.
+        self.owners: list[list[Optional[tuple[int, int]]]] = []
+        self.owned: dict[tuple[int, int], set[tuple[int, int]]] = {}
+
+    def _flood(self, frontier: list[tuple[float, int, int]]) -> None:
+        """Floods outward from the cells in frontier, passing on their owners to every cell they are now closest to."""
+
+        costs: list[list[int]] = self.game_map.move_costs
+        width: int = self.game_map.width
+        height: int = self.game_map.height
+        distances: list[list[float]] = self.distances
+        owners: list[list[Optional[tuple[int, int]]]] = self.owners
+
+        heapq.heapify(frontier)
+        while frontier:
+            (distance, x, y) = heapq.heappop(frontier)
+            if distance > distances[x][y]:
+                continue
+
+            step_cost: int = costs[x][y] if (x, y) not in self.goals else 1
+            if not step_cost:
+                continue
+
+            owner: Optional[tuple[int, int]] = owners[x][y]
+            for (dx, dy) in pathfinding.DIRECTIONS:
+                nx: int = x + dx
+                ny: int = y + dy
+                if 0 <= nx < width and 0 <= ny < height and costs[nx][ny] and distance + step_cost < distances[nx][ny]:
+                    old_owner: Optional[tuple[int, int]] = owners[nx][ny]
+                    if old_owner is not None:
+                        self.owned[old_owner].discard((nx, ny))
+                    distances[nx][ny] = distance + step_cost
+                    owners[nx][ny] = owner
+                    self.owned[owner].add((nx, ny))
+                    heapq.heappush(frontier, (distance + step_cost, nx, ny))
+
+    def compute(self, goals: set[tuple[int, int]]) -> None:
+        """Floods outward from the goals over the walkable layer, storing the cost to reach a goal from each cell."""
+
+        width: int = self.game_map.width
+        height: int = self.game_map.height
+
+        self.goals = set(goals)
+        self.distances = [[math.inf] * height for _ in range(width)]
+        self.owners = [[None] * height for _ in range(width)]
+        self.owned = {}
+
+        frontier: list[tuple[float, int, int]] = []
+        for (x, y) in self.goals:
+            if self.game_map.in_bounds(x, y):
+                self.distances[x][y] = 0
+                self.owners[x][y] = (x, y)
+                self.owned[(x, y)] = {(x, y)}
+                frontier.append((0, x, y))
+
+        self._flood(frontier)
+
+    def remove_goals(self, goals: set[tuple[int, int]]) -> None:
+        """Stops leading toward some goals, only updating the cells that were closest to them."""
+
+        goals = goals & self.goals
+        if not goals:
+            return
+
+        self.goals -= goals
+
+        # Forget the distances of every cell that was closest to a removed goal.
+        region: set[tuple[int, int]] = set()
+        for goal in goals:
+            region |= self.owned.pop(goal, set())
+        for (x, y) in region:
+            self.distances[x][y] = math.inf
+            self.owners[x][y] = None
+
+        # Then flood back into them from the edge of what's left.
+        costs: list[list[int]] = self.game_map.move_costs
+        frontier: list[tuple[float, int, int]] = []
+        for (x, y) in region:
+            for (dx, dy) in pathfinding.DIRECTIONS:
+                nx: int = x + dx
+                ny: int = y + dy
+                if self.game_map.in_bounds(nx, ny) and self.owners[nx][ny] is not None:
+                    step_cost: int = costs[nx][ny] if (nx, ny) not in self.goals else 1
+                    if step_cost:
+                        frontier.append((self.distances[nx][ny], nx, ny))
+
+        self._flood(frontier)
+
+
+class Explorer:
+    """Keeps track of which item cells the player has stood on, and leads them to the nearest of whatever they haven't
+    seen (as remembered by the fog of war) or stood on."""
+
+    def __init__(self, game_map: map.Map) -> None:
+        self.game_map: map.Map = game_map
+
+        self.visited: set[tuple[int, int]] = set()
+
+        self.frontier_map: FrontierMap = FrontierMap(game_map)
+        self.dirty: bool = True
+        self.item_cells: set[tuple[int, int]] = set()
+
+        game_map.cell_listeners.append(self.on_cell_changed)
+
+    def _get_item_cells(self) -> set[tuple[int, int]]:
+        """Returns every cell with an item on it."""
+
+        return {(item_.x, item_.y) for item_ in self.game_map.game_entities.items}
+
+    def _get_goals(self) -> set[tuple[int, int]]:
+        """Returns the walkable cells not seen yet, and the cells with items not stood on yet."""
+
+        walkable: numpy.ndarray = numpy.array(self.game_map.move_costs, dtype=bool)
+        unexplored: set[tuple[int, int]] = {
+            (int(x), int(y)) for (x, y) in zip(*numpy.nonzero(walkable & ~self.game_map.fog.get_explored()))
+        }
+        return unexplored | (self.item_cells - self.visited)
+
+    def reset(self) -> None:
+        """Forgets everything, ie: when a new floor is built."""
+
+        self.visited = set()
+        self.dirty = True
+
+    def look(self, x: int, y: int) -> None:
+        """Marks everything visible from a cell as explored, and the cell itself as visited."""
+
+        newly_seen: Optional[numpy.ndarray] = self.game_map.fog.look(x, y)
+        self.visited.add((x, y))
+
+        if not self.dirty:
+            seen: set[tuple[int, int]] = set()
+            if newly_seen is not None:
+                seen = {(int(cx), int(cy)) for (cx, cy) in zip(*numpy.nonzero(newly_seen))}
+            if (x, y) in self.item_cells:
+                seen.add((x, y))
+            self.frontier_map.remove_goals(seen - (self.item_cells - self.visited))
+
+    def on_cell_changed(self, x: int, y: int) -> None:
+        """Called by the map when the walkable layer changes, ie: a door is opened."""
+
+        self.dirty = True
+
+    def get_step(self, x: int, y: int) -> Optional[tuple[int, int]]:
+        """Returns the direction to step from a cell toward the nearest thing left to explore,
+        or None if there's nothing left that can be reached."""
+
+        self.look(x, y)
+
+        # Items come and go (ie: when thrown or picked up), so check for that before trusting the map.
+        item_cells: set[tuple[int, int]] = self._get_item_cells()
+        if self.dirty or item_cells != self.item_cells:
+            self.item_cells = item_cells
+            self.frontier_map.compute(self._get_goals())
+            self.dirty = False
+
+        return self.frontier_map.get_step(x, y)
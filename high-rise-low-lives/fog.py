@@ -0,0 +1,87 @@
+from __future__ import annotations
+from typing import Optional
+import numpy
+import map
+
+
+class FogOfWar:
+    """Keeps track of what the player can see right now and what they have seen before on each floor of the tower.
+    What's been seen is kept as bits packed eight to a byte, one array per floor, so remembering the whole tower is
+    cheap. What can be seen right now is only worked out again when the player moves or something they can see starts
+    or stops blocking the view (ie: a door opens or closes)."""
+
+    def __init__(self, game_map: map.Map) -> None:
+        self.game_map: map.Map = game_map
+
+        # The bits of which cells have been seen on each floor, by floor number.
+        self.floors: dict[int, numpy.ndarray] = {}
+
+        # Whether each cell can be seen right now, indexed [x, y], and where it was seen from.
+        self.visible: numpy.ndarray = numpy.zeros((0, 0), dtype=bool)
+        self.viewer: Optional[tuple[int, int]] = None
+
+        # The bits of the current floor unpacked, indexed [x, y], kept until more of the floor is seen.
+        self.explored: Optional[numpy.ndarray] = None
+
+        game_map.cell_listeners.append(self.on_cell_changed)
+
+    def reset(self) -> None:
+        """Gets ready for the current floor, ie: when it's built. What was seen of it before is kept if it's the same
+        size."""
+
+        cell_count: int = self.game_map.width * self.game_map.height
+        bits: Optional[numpy.ndarray] = self.floors.get(self.game_map.floor)
+        if bits is None or bits.size != (cell_count + 7) // 8:
+            self.floors[self.game_map.floor] = numpy.zeros((cell_count + 7) // 8, dtype=numpy.uint8)
+
+        self.visible = numpy.zeros((self.game_map.width, self.game_map.height), dtype=bool)
+        self.viewer = None
+        self.explored = None
+
+    def look(self, x: int, y: int) -> Optional[numpy.ndarray]:
+        """Works out what can be seen from a cell, unless nothing has changed since the last time. Returns a boolean
+        array of the cells seen for the first time, indexed [x, y], or None if nothing was worked out."""
+
+        if self.visible.shape != (self.game_map.width, self.game_map.height):
+            self.reset()
+        if self.viewer == (x, y):
+            return None
+
+        self.viewer = (x, y)
+        self.visible = self.game_map.visibility.get_visible_from(x, y)
+
+        bits: numpy.ndarray = self.floors[self.game_map.floor]
+        seen: numpy.ndarray = numpy.packbits(self.visible.ravel())
+        newly_seen: numpy.ndarray = seen & ~bits
+        if not newly_seen.any():
+            return None
+
+        bits |= seen
+        self.explored = None
+        return numpy.unpackbits(newly_seen, count=self.visible.size).reshape(self.visible.shape).astype(bool)
+
+    def on_cell_changed(self, x: int, y: int) -> None:
+        """Called by the map when something changes at a cell. Only a cell that can be seen right now can change what
+        else can be seen."""
+
+        if self.visible.size and self.visible[x, y]:
+            self.viewer = None
+
+    def is_visible(self, x: int, y: int) -> bool:
+        """Returns whether the player can see a cell right now."""
+
+        return bool(self.visible[x, y]) if self.game_map.in_bounds(x, y) and self.visible.size else False
+
+    def get_explored(self) -> numpy.ndarray:
+        """Returns a boolean array of every cell seen so far on the current floor, indexed [x, y]."""
+
+        if self.visible.shape != (self.game_map.width, self.game_map.height):
+            self.reset()
+
+        if self.explored is None:
+            cell_count: int = self.game_map.width * self.game_map.height
+            self.explored = numpy.unpackbits(self.floors[self.game_map.floor], count=cell_count).reshape(
+                (self.game_map.width, self.game_map.height)
+            ).astype(bool)
+
+        return self.explored
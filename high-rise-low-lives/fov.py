@@ -0,0 +1,10 @@
+import numpy
+import tcod
+
+
+def compute_fov(transparency: numpy.ndarray, x: int, y: int, radius: int = 0) -> numpy.ndarray:
+    """Returns a boolean array of every cell that can be seen from a point, given an array of which cells can be seen
+    through. A radius of 0 means there is no limit to how far can be seen."""
+
+    # if TCOD:
+    return tcod.map.compute_fov(transparency, (x, y), radius, True)
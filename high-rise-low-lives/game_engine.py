@@ -39,8 +39,10 @@ class GameEngine:
         self.state: game_states.BaseState = self.playing_state
         self.prev_states: list[game_states.BaseState] = []
 
+        # The size of the map area of the screen, which the viewport shows the floor through.
         self.MAP_WIDTH: int = map_size[0]
         self.MAP_HEIGHT: int = map_size[1]
+        self.entities.viewport.set_size(self.MAP_WIDTH, self.MAP_HEIGHT)
 
     def set_state(self, new_state: game_states.BaseState) -> None:
         """Sets the state the game is in."""
@@ -64,9 +66,12 @@ class GameEngine:
     def handle_rendering(self, window: Any, surface: Any) -> None:
         """Handle all rendering for the game."""
 
-        rendering.clear_surface(surface)
-        self.state.handle_rendering(surface)
-        rendering.present_surface(window, surface)
+        with self.entities.phase_timer.phase("render"):
+            rendering.clear_surface(surface)
+            self.state.handle_rendering(surface)
+            rendering.present_surface(window, surface)
+
+        self.entities.phase_timer.end_frame()
 
     def handle_input(self) -> None:
         """Handle all input for the game."""
@@ -77,14 +82,33 @@ class GameEngine:
             if event_type == input.EventType.QUIT:
                 raise SystemExit()
             elif event_type == input.EventType.KEYDOWN:
-                self.state.handle_input(event_key)
+                # Only handling the key is timed, not waiting for it to be pressed.
+                with self.entities.phase_timer.phase("input"):
+                    self.state.handle_input(event_key)
 
-                if event_key == input.Key.ESCAPE:
-                    self.reverse_state()
+                    if event_key == input.Key.ESCAPE:
+                        self.reverse_state()
 
                 break
 
+    def handle_interrupts(self) -> None:
+        """Handle input while the game is busy: any key pressed stops whatever is going on, and is thrown away rather
+        than played back once it's done."""
+
+        for event_type in input.poll_pending():
+            if event_type == input.EventType.QUIT:
+                raise SystemExit()
+            elif event_type == input.EventType.KEYDOWN:
+                self.state.interrupt()
+
     def handle_updates(self) -> None:
         """Handle all updates for the game."""
 
-        self.state.handle_updates()
+        with self.entities.phase_timer.phase("updates"):
+            self.state.handle_updates()
+
+    def is_busy(self) -> bool:
+        """Returns whether the game is in the middle of something (like the player running) and shouldn't wait for
+        input before the next update."""
+
+        return self.state.is_busy()
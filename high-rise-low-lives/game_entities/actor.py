@@ -1,16 +1,19 @@
 from __future__ import annotations
 from enum import Enum, auto
 from typing import Optional, Any, Callable
+import math
 import databases
 import interface
 import items
+import inventory
+import stats
+import vents
 from .entities import GameEntities
 from .entity import Entity
 from .item_entity import ItemEntity
 from .vent import Vent
 from .door import Door
 from .terminal import Terminal
-from .trap import Trap
 from .explosive import Explosive
 
 
@@ -54,10 +57,14 @@ class Actor(Entity):
             color: tuple[int, int, int],
             game_data: databases.Databases,
             game_entities_: GameEntities,
-            game_interface: interface.Interface
+            game_interface: interface.Interface,
+            faction: str = "CORP"
     ) -> None:
         super().__init__(x, y, name, desc, True, graphic, color, game_data, game_entities_, game_interface)
 
+        # Which faction the actor belongs to, which decides who it fights.
+        self.faction: str = faction
+
         # Background
         self.race: str = race
         self.class_name: str = class_name
@@ -74,8 +81,6 @@ class Actor(Entity):
         self.hacking_skill: int = 10
 
         # Other stats
-        self.charge_percent = 100
-        self.health: int = health
         self.mp: int = 50
         self.ac: int = 6
         self.base_atk_dmg: int = 10
@@ -92,9 +97,16 @@ class Actor(Entity):
         self.reload_speed: int = 10
         self.recovery_rate: int = 10
 
+        # Health recovers and charge drains over time. Rather than changing them every tick, they are worked out from
+        # the game time whenever they're read (see the health and charge_percent properties).
+        self._health_stat: stats.TimedStat = stats.TimedStat(
+            health, game_entities_.game_time, self.recovery_rate, 1, limit=100
+        )
+        self._charge_stat: stats.TimedStat = stats.TimedStat(100, game_entities_.game_time)
+
         # Inventory/Equipment
         self.MAX_INVENTORY_SIZE: int = 52
-        self.inventory: dict = {}
+        self.inventory: inventory.Inventory = inventory.Inventory()
         self.wielding: Optional[items.Weapon] = None
         self.wearing: Optional[str] = None
         self.throwing: Optional[items.Item] = None
@@ -113,6 +125,7 @@ class Actor(Entity):
 
         # Misc
         self.in_vents: bool = False
+        self.killed_by: Optional[str] = None  # The name of whatever killed the actor, once it's dead.
 
         # This contains a function name corresponding to one of the AI functions in ai.py
         self.ai: Callable[[Actor, list[Actor]], None] = ai_
@@ -122,62 +135,58 @@ class Actor(Entity):
             self._do_action(self.Action.REST, 1)
 
         game_entities_.actors.append(self)
+        game_entities_.add_live_actor(self)
 
-    def _think(self) -> None:
-        """Used by non-player actors to call their corresponding AI function."""
+    @property
+    def health(self) -> int:
+        # The dead don't recover.
+        if self._health_stat.value <= 0:
+            return self._health_stat.value
+
+        return self._health_stat.get(self.game_entities.game_time)
+
+    @health.setter
+    def health(self, value: int) -> None:
+        self._health_stat.set(value, self.game_entities.game_time)
 
-        self.ai(self, self.game_entities.actors)
+    @property
+    def charge_percent(self) -> int:
+        return self._charge_stat.get(self.game_entities.game_time)
 
-    def _get_next_item_id(self) -> str:
-        """Finds the correct a-zA-Z character to assign as an id to a newly acquired items."""
+    @charge_percent.setter
+    def charge_percent(self, value: int) -> None:
+        self._charge_stat.set(value, self.game_entities.game_time)
+
+    def _think(self) -> None:
+        """Used by non-player actors to call their corresponding AI function."""
 
-        # Item IDs can be a-zA-Z so loop through all ASCII numbers that match letters.
-        for item_id in range(ord('a'), ord('z') + 1):
-            if not chr(item_id) in self.inventory:
-                return chr(item_id)
-        for item_id in range(ord('A'), ord('Z') + 1):
-            if not chr(item_id) in self.inventory:
-                return chr(item_id)
+        with self.game_entities.phase_timer.phase("ai"):
+            self.ai(self, self.game_entities.actors)
 
     def _dec_item_count(self, item_id: str, amount: int = 1) -> None:
         """Decreases the amount of an item in the inventory and deletes it if zero."""
 
-        self.inventory[item_id]["Amount"] -= amount
-
-        if self.inventory[item_id]["Amount"] == 0:
-            del self.inventory[item_id]
+        self.inventory.remove(item_id, amount)
 
     def _dec_ammo_count(self, caliber: str, amount: int = 1) -> None:
         """Called when the player fires a ranged weapon and we need to decrease the correct ammo from inventory."""
 
-        for ammo_ in self.inventory.items():
-            if isinstance(ammo_[1]["Item"], items.Ammo) and ammo_[1]["Item"].caliber == caliber:
-                ammo_[1]["Amount"] -= amount
-
-                if ammo_[1]["Amount"] == 0:
-                    del self.inventory[ammo_[0]]
-
-                return
+        self.inventory.remove_ammo(caliber, amount)
 
-    def _die(self) -> None:
+    def _die(self, killer: Entity) -> None:
         """Called when actor's HP reaches zero."""
 
+        self.killed_by = killer.name
         self.graphic = self.game_data.tiles["CORPSE"]["Character"]
         self.color = self.game_data.tiles["CORPSE"]["Color"]
         self.blocked = self.game_data.tiles["CORPSE"]["Blocked"]
+        self.game_entities.remove_live_actor(self)
         # In future remove actor from game and replace with Corpse entity that holds actor's stats incase of revival.
 
         # Just quit the game for now to prevent crash.
         if isinstance(self, Player):
             raise SystemExit()
 
-    def _recover(self) -> None:
-        """Restores some stats to the actor."""
-
-        self.health += 1
-        if self.health > 100:
-            self.health = 100
-
     def _reset_action(self) -> None:
         """Called after action cooldown has passed.
            Resets all counters and associated variables allowing for new action to be selected."""
@@ -388,12 +397,18 @@ class Actor(Entity):
         """Increases charge of actor."""
 
         powersrc: items.PowerSource = self.inventory[self.action_target]["Item"]
-        self.charge_percent += powersrc.charge_held
+        charge: int = powersrc.get_charge(self.game_entities.game_time)
+        self.charge_percent += charge
 
-        self.game_interface.message_box.add_msg(
-            f"{self.name} receives {powersrc.charge_held}% charge from a {powersrc.name}.",
-            self.game_data.colors["SUCCESS_MSG"]
-        )
+        if charge > 0:
+            self.game_interface.message_box.add_msg(
+                f"{self.name} receives {charge}% charge from a {powersrc.name}.",
+                self.game_data.colors["SUCCESS_MSG"]
+            )
+        else:
+            self.game_interface.message_box.add_msg(
+                f"The {powersrc.name} has gone flat.", self.game_data.colors["ERROR_MSG"]
+            )
 
         self._dec_item_count(self.action_target)
 
@@ -420,37 +435,32 @@ class Actor(Entity):
     def add_inventory(self, item_: items.Item, amount: int = 1) -> None:
         """Adds an item to the inventory"""
 
-        self.inventory[self._get_next_item_id()] = {"Item": item_, "Amount": amount}
+        self.inventory.add(item_, amount, self.game_entities.game_time)
 
-    def get_wieldable_items(self) -> [items.Wieldable]:
+    def get_wieldable_items(self) -> list[tuple[str, dict]]:
         """Returns a list of items in the actor's inventory that can be wielded."""
 
-        return [item_ for item_ in self.inventory.items() if isinstance(item_[1]["Item"], items.Wieldable)]
+        return self.inventory.get_view(inventory.Inventory.Category.WIELDABLE)
 
-    def get_throwable_items(self) -> [items.Throwable]:
+    def get_throwable_items(self) -> list[tuple[str, dict]]:
         """Returns a list of items in the actor's inventory that can be thrown."""
 
-        return [item_ for item_ in self.inventory.items() if isinstance(item_[1]["Item"], items.Throwable)]
+        return self.inventory.get_view(inventory.Inventory.Category.THROWABLE)
 
-    def get_drug_items(self) -> [items.Drug]:
+    def get_drug_items(self) -> list[tuple[str, dict]]:
         """Returns a list of drugs in the actor's inventory."""
 
-        return [item_ for item_ in self.inventory.items() if isinstance(item_[1]["Item"], items.Drug)]
+        return self.inventory.get_view(inventory.Inventory.Category.DRUG)
 
-    def get_power_sources(self) -> [items.PowerSource]:
+    def get_power_sources(self) -> list[tuple[str, dict]]:
         """Returns a list of power sources in the actor's inventory."""
 
-        return [item_ for item_ in self.inventory.items() if isinstance(item_[1]["Item"], items.PowerSource)]
+        return self.inventory.get_view(inventory.Inventory.Category.POWER_SOURCE)
 
     def get_ammo_amount(self, caliber: str) -> int:
         """Returns how much ammo of a given caliber the actor has in inventory."""
 
-        total_amount = 0
-        for ammo_ in self.inventory.items():
-            if isinstance(ammo_[1]["Item"], items.Ammo) and ammo_[1]["Item"].caliber == caliber:
-                total_amount += ammo_[1]["Amount"]
-
-        return total_amount
+        return self.inventory.get_ammo_amount(caliber)
 
     def receive_hit(
             self,
@@ -508,7 +518,7 @@ class Actor(Entity):
 
             msg_color = self.game_data.colors["KILL_MSG"]
 
-            self._die()
+            self._die(src_entity)
 
         self.game_interface.message_box.add_msg(hit_msg, msg_color)
 
@@ -524,8 +534,11 @@ class Actor(Entity):
                     )
                 return
 
+        old_x: int = self.x
+        old_y: int = self.y
         self.x = self.dest_x
         self.y = self.dest_y
+        self.game_entities.move_live_actor(self, old_x, old_y)
 
     def attempt_atk(
             self,
@@ -564,9 +577,9 @@ class Actor(Entity):
         self.dest_x = new_x
         self.dest_y = new_y
 
-        # We want to check what entites are occupying the move destination if not in the vents.
+        # We want to check what entites are occupying the move destination unless crawling from vent to vent.
         # Do different things depending on what's there.
-        if not self.in_vents:
+        if not self.in_vents or not self.game_entities.game_map.vent_network.is_vent(new_x, new_y):
             dest_entities: list[Entity] = self.game_entities.get_all_at(new_x, new_y)
             for dest_entity in dest_entities:
                 # Check to see if destination has an Actor, if so perform melee attack
@@ -683,10 +696,6 @@ class Actor(Entity):
         if self.health <= 0:
             return
 
-        # Check if time to recover
-        if game_time > 0 and (game_time % self.recovery_rate) == 0:
-            self._recover()
-
         # If actor is still in cooldown from previous action, decrease cooldown.
         if self.action_cooldown > 0:
             self.action_cooldown -= 1
@@ -695,6 +704,22 @@ class Actor(Entity):
             if self.action_cooldown == 0:
                 self._reset_action()
 
+    def get_idle_ticks(self, game_time: int) -> float:
+        """An actor is idle while cooling down from an action."""
+
+        if self.health <= 0:
+            return math.inf
+        if self.action_cooldown <= 0:
+            return 0
+
+        return self.action_cooldown - 1
+
+    def skip_ticks(self, ticks: int) -> None:
+        """Counts down the action cooldown."""
+
+        if self.health > 0:
+            self.action_cooldown -= ticks
+
 
 class Player(Actor):
     """Represents the player character."""
@@ -720,13 +745,16 @@ class Player(Actor):
             game_interface: interface.Interface
     ) -> None:
         super().__init__(name, race, class_name, desc, x, y, health, muscle, smarts, reflexes, wits, grit,
-                         None, graphic, color, game_data, game_entities_, game_interface)
+                         None, graphic, color, game_data, game_entities_, game_interface, "PLAYER")
 
         self.examine_target: Any = None  # What the player selected to examine.
         self.item_selected: Optional[items.Item] = None  # What the player has selected from inventory to be used.
 
-        self.max_charge_loss_delay: int = 100  # The number of turns before losing a percent of charge.
-        self.charge_loss_delay = self.max_charge_loss_delay
+        # The player loses a percent of charge every this many turns, counting from when they were created.
+        self.max_charge_loss_delay: int = 100
+        self._charge_stat = stats.TimedStat(
+            self.charge_percent, game_entities_.game_time, self.max_charge_loss_delay, -1, game_entities_.game_time, 0
+        )
 
         self.vent_speed_multi = 2
 
@@ -736,28 +764,24 @@ class Player(Actor):
         """Moves the player."""
 
         super().move()
+        self.game_entities.game_map.explorer.look(self.x, self.y)
 
-        # If the player moves into or out of vents, change what is visible.
-        vent_: Vent = self.game_entities.get_vent_at(self.x, self.y)
-        if vent_ is not None:
+        # If the player moves into or out of vents, switch which plane is drawn.
+        vent_network: vents.VentNetwork = self.game_entities.game_map.vent_network
+        if vent_network.is_vent(self.x, self.y):
             if not self.in_vents:
-                self.game_entities.show_vents()
+                self.game_entities.set_plane(vents.Plane.VENTS)
                 self.in_vents = True
                 self.move_speed *= self.vent_speed_multi
-            elif vent_.entrance:
-                self.game_entities.hide_vents()
+            elif vent_network.is_entrance(self.x, self.y):
+                self.game_entities.set_plane(vents.Plane.FLOOR)
                 self.in_vents = False
                 self.move_speed /= self.vent_speed_multi
         elif self.in_vents:
-            self.game_entities.hide_vents()
+            self.game_entities.set_plane(vents.Plane.FLOOR)
             self.in_vents = False
             self.move_speed /= self.vent_speed_multi
 
-        # If the player walks onto a trap, trigger it.
-        trap_: Trap = self.game_entities.get_trap_at(self.x, self.y)
-        if trap_ is not None:
-            trap_.trigger()
-
     def attempt_move(self, x: int, y: int) -> bool:
         """Does some checks before actually letting the player move."""
 
@@ -765,27 +789,16 @@ class Player(Actor):
         new_x: int = self.x + x
         new_y: int = self.y + y
 
-        # If the player is in the vents, make it so they can't move through un-blocked entities like floors.
-        vent_to: Vent = self.game_entities.get_vent_at(new_x, new_y)
-        vent_on: Vent = self.game_entities.get_vent_at(self.x, self.y)
+        # Inside the vents the player can only crawl along them, getting out at an entrance, and from outside they can
+        # only get in at an entrance.
+        vent_network: vents.VentNetwork = self.game_entities.game_map.vent_network
+        vent_to: bool = vent_network.is_vent(new_x, new_y)
+        on_entrance: bool = vent_network.is_entrance(self.x, self.y)
 
-        if self.in_vents and vent_to is None and vent_on is not None and not vent_on.entrance:
+        if self.in_vents and not vent_to and not on_entrance:
             return False
 
-        if not self.in_vents and \
-                ((vent_to is not None and not vent_to.entrance) and (vent_on is None or not vent_on.entrance)):
+        if not self.in_vents and vent_to and not vent_network.is_entrance(new_x, new_y) and not on_entrance:
             return False
 
-        super().attempt_move(x, y)
-
-    def update(self, game_time: int) -> None:
-        """Updates the player."""
-
-        super().update(game_time)
-
-        # Decreases the player's charge as time goes on.
-        self.charge_loss_delay -= 1
-
-        if self.charge_loss_delay == 0:
-            self.charge_percent -= 1
-            self.charge_loss_delay = self.max_charge_loss_delay
+        return super().attempt_move(x, y)
@@ -1,6 +1,8 @@
 from __future__ import annotations
+import math
 import databases
 import interface
+import triggers
 from .entities import GameEntities
 from .entity import Entity
 
@@ -34,22 +36,48 @@ class Camera(Entity):
         self.fov: list[tuple[int, int]] = self.compute_fov(self.radius)
 
         self.triggered: bool = False  # If the player triggered this camera to sound alarms
+        # The player while they're in view. They're only spotted once they're in the light, which can happen after they
+        # walk into view (ie: they step out of a shadow or a light comes on), so they're watched until they leave.
+        self.watching: set[Entity] = set()
+
+        # Get told whenever anyone walks into or out of view instead of looking for the player every tick.
+        self.game_entities.triggers.add(
+            triggers.TriggerVolume(
+                self, {(point[0], point[1]) for point in self.fov}, self._on_enter, self.watching.discard
+            )
+        )
 
         self.game_entities.cameras.append(self)
+        self.game_entities.layer_changed("cameras")
+
+    def _on_enter(self, actor_: Entity) -> None:
+        """Called when an actor walks into the camera's view."""
+
+        if actor_.faction == "PLAYER" and not self.triggered:
+            self.watching.add(actor_)
+            self._look()
+
+    def _look(self) -> None:
+        """If the player is in view and standing in the light, sound alarms by making a lot of noise."""
+
+        for actor_ in self.watching:
+            if self.game_entities.game_map.lighting.is_lit(actor_.x, actor_.y):
+                self.triggered = True
+                self.watching.clear()
+                self.game_interface.message_box.add_msg(
+                    f"You've been spotted! Alarms sounded!", self.game_data.colors["SYS_MSG"]
+                )
+                return
 
     def update(self, game_time: int) -> None:
         """Updates the camera."""
 
-        if not self.triggered:
-            # Check if player is within FOV, if so sound alarms by making a lot of noise.
-            # Eventually also do stealth check.
-            for point in self.fov:
-                if point[0] == self.game_entities.player.x and point[1] == self.game_entities.player.y:
-                    self.triggered = True
-                    self.game_interface.message_box.add_msg(
-                        f"You've been spotted! Alarms sounded!", self.game_data.colors["SYS_MSG"]
-                    )
-                    break
-
+        if self.watching:
+            self._look()
         if self.triggered:
             self.make_noise(999)
+
+    def get_idle_ticks(self, game_time: int) -> float:
+        """A triggered camera makes noise every tick, and one with the player in view looks for them every tick."""
+
+        return 0 if self.triggered or self.watching else math.inf
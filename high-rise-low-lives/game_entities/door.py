@@ -35,6 +35,7 @@ class Door(Entity):
         self.locked: bool = False
 
         game_entities_.doors.append(self)
+        game_entities_.layer_changed("doors")
 
     def open(self) -> None:
         """Changes the appearance of the door and makes it no longer blocked."""
@@ -44,6 +45,7 @@ class Door(Entity):
         self.graphic = self.game_data.tiles["DOOR_OPEN"]["Character"]
         self.color = self.game_data.tiles["DOOR_OPEN"]["Color"]
         self.cover_percent = self.game_data.tiles["DOOR_OPEN"]["Cover Percent"]
+        self.game_entities.game_map.update_cell(self.x, self.y)
 
     def close(self) -> None:
         """Changes the appearance of the door and makes it blocked."""
@@ -53,3 +55,16 @@ class Door(Entity):
         self.graphic = self.game_data.tiles["DOOR_CLOSED"]["Character"]
         self.color = self.game_data.tiles["DOOR_CLOSED"]["Color"]
         self.cover_percent = self.game_data.tiles["DOOR_CLOSED"]["Cover Percent"]
+        self.game_entities.game_map.update_cell(self.x, self.y)
+
+    def lock(self) -> None:
+        """Locks the door so that it can't be opened."""
+
+        self.locked = True
+        self.game_entities.game_map.update_cell(self.x, self.y)
+
+    def unlock(self) -> None:
+        """Unlocks the door so that it can be opened again."""
+
+        self.locked = False
+        self.game_entities.game_map.update_cell(self.x, self.y)
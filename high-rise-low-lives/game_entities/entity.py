@@ -8,6 +8,10 @@ import bresenham
 import rendering
 
 
+# How bright things remembered from earlier are drawn, compared to things in view in full light.
+REMEMBERED_BRIGHTNESS: float = 0.35
+
+
 class Entity:
     """Represents any game entity."""
 
@@ -46,16 +50,34 @@ class Entity:
 
         game_entities_.all.append(self)
 
-    def render(self, surface: Any) -> None:
-        """Renders the entity."""
+    def render(self, surface: Any, brightness: float = 1) -> None:
+        """Renders the entity, dimmed by how little light falls on it (or REMEMBERED_BRIGHTNESS if it's only
+        remembered)."""
 
         if self.visible:
-            rendering.render(surface, self.graphic, self.x, self.y, self.color, self.bgcolor)
+            color: Optional[tuple[int, int, int]] = self.color
+            if brightness < 1 and color is not None:
+                color = tuple(round(channel * brightness) for channel in color)
+
+            (screen_x, screen_y) = self.game_entities.viewport.to_screen(self.x, self.y)
+            rendering.render(surface, self.graphic, screen_x, screen_y, color, self.bgcolor)
 
     def update(self, game_time: int) -> None:
         """Updates the entity."""
         pass
 
+    def get_idle_ticks(self, game_time: int) -> float:
+        """Returns how many ticks after game_time will pass before updating this entity does anything more than count
+        down, so they can be skipped all at once. Anything that overrides update should override this too, and be in
+        one of the lists EntityManager.skip_idle_ticks looks through."""
+
+        return math.inf
+
+    def skip_ticks(self, ticks: int) -> None:
+        """Counts down whatever update would have counted down over a number of idle ticks."""
+
+        pass
+
     def remove(self) -> None:
         """Removes the entity from the list of all entities."""
 
@@ -64,8 +86,10 @@ class Entity:
                 self.game_entities.all.pop(entity_[0])
 
     def make_noise(self, noise_radius: int) -> None:
-        """Causes this entity to make noise."""
+        """Causes this entity to make noise, which spreads out over the floor for anyone nearby to hear."""
+
         self.noise_level = noise_radius
+        self.game_entities.game_map.noise_field.emit(self, self.x, self.y, noise_radius)
 
     def highlight(self, color: Optional[tuple[int, int, int]]):
         """Highlights this entity by setting it's background color.
@@ -93,26 +117,33 @@ class Entity:
     ) -> list[tuple[int, int]]:
         """Uses the bresenham line algorithm to get a list of points on the map the LOS would pass through."""
 
-        end_x: int = x2
-        end_y: int = y2
+        with self.game_entities.phase_timer.phase("los"):
+            end_x: int = x2
+            end_y: int = y2
+
+            # Extend the path beyond where entity selected using slope of line.
+            if extend:
+                end_x = x2 + ((x2 - self.x) * 20)  # 20 is arbitrary number for max LOS range.
+                end_y = y2 + ((y2 - self.y) * 20)
 
-        # Extend the path beyond where entity selected using slope of line.
-        if extend:
-            end_x = x2 + ((x2 - self.x) * 20)  # 20 is arbitrary number for max LOS range.
-            end_y = y2 + ((y2 - self.y) * 20)
+            # Disclude the entity from the LOS.
+            los: list[tuple[int, int]] = bresenham.bresenham((self.x, self.y), (end_x, end_y))[1:]
 
-        # Disclude the entity from the LOS.
-        los: list[tuple[int, int]] = bresenham.bresenham((self.x, self.y), (end_x, end_y))[1:]
+            # Check each point in the LOS if it's 100% cover (basically meaning it's a wall). If so, stop the LOS
+            # there.
+            final_los: list[tuple[int, int]] = []
+            for point in los:
+                final_los.append(point)
+                for entity in self.game_entities.get_all_at(point[0], point[1]):
+                    if entity.cover_percent == 100 or (not ignore_cover and entity.blocked):
+                        return final_los
 
-        # Check each point in the LOS if it's 100% cover (basically meaning it's a wall). If so, stop the LOS there.
-        final_los: list[tuple[int, int]] = []
-        for point in los:
-            final_los.append(point)
-            for entity in self.game_entities.get_all_at(point[0], point[1]):
-                if entity.cover_percent == 100 or (not ignore_cover and entity.blocked):
-                    return final_los
+            return final_los
 
-        return final_los
+    def can_see(self, x: int, y: int) -> bool:
+        """Returns whether a point is in view of this entity, ignoring how far away it is."""
+
+        return self.game_entities.game_map.visibility.can_see(self.x, self.y, x, y)
 
     def render_projectile(
             self,
@@ -123,9 +154,15 @@ class Entity:
     ) -> None:
         """'Animates' a projectile as it flies through the air by sleeping briefly between renders."""
 
+        # Nothing to animate when playing without a window, ie: in simulations.
+        if self.game_entities.window is None:
+            return
+
         self.game_entities.render_all(self.game_entities.surface)
         for point in points:
-            rendering.render(self.game_entities.surface, char, point[0], point[1], color)
+            if self.game_entities.viewport.contains(point[0], point[1]):
+                (screen_x, screen_y) = self.game_entities.viewport.to_screen(point[0], point[1])
+                rendering.render(self.game_entities.surface, char, screen_x, screen_y, color)
         self.game_entities.window.present(self.game_entities.surface)
         time.sleep(delay)
 
@@ -133,25 +170,27 @@ class Entity:
         """Computes all seeable points in a radius from the entity by casting a line along the circumference
         of the radius and seeing if the line hits any blocked objects."""
 
-        top: int = self.y - radius
-        bottom: int = self.y + radius
-        left: int = self.x - radius
-        right: int = self.x + radius
-
-        # Gets each point along the circumference of the circle formed by the radius
-        circ_points: list[tuple[int, int]] = []
-        for y in range(top, bottom + 1):
-            for x in range(left, right + 1):
-                distance: float = math.dist((x, y), (self.x, self.y))
-
-                if 0.0 <= (radius - distance) < 1.0:
-                    circ_points.append((x, y))
-
-        # Now calculate the line-of-sight to each point along the circumference to check if anything is blocking view
-        fov: list[tuple[int, int]] = []
-        for circ_point in circ_points:
-            los: list[tuple[int, int]] = self.get_line_of_sight(circ_point[0], circ_point[1], False, ignore_cover)
-            for los_point in los:
-                fov.append(los_point)
-
-        return fov
+        with self.game_entities.phase_timer.phase("fov"):
+            top: int = self.y - radius
+            bottom: int = self.y + radius
+            left: int = self.x - radius
+            right: int = self.x + radius
+
+            # Gets each point along the circumference of the circle formed by the radius
+            circ_points: list[tuple[int, int]] = []
+            for y in range(top, bottom + 1):
+                for x in range(left, right + 1):
+                    distance: float = math.dist((x, y), (self.x, self.y))
+
+                    if 0.0 <= (radius - distance) < 1.0:
+                        circ_points.append((x, y))
+
+            # Now calculate the line-of-sight to each point along the circumference to check if anything is blocking
+            # view
+            fov: list[tuple[int, int]] = []
+            for circ_point in circ_points:
+                los: list[tuple[int, int]] = self.get_line_of_sight(circ_point[0], circ_point[1], False, ignore_cover)
+                for los_point in los:
+                    fov.append(los_point)
+
+            return fov
@@ -1,5 +1,12 @@
 from __future__ import annotations
 from typing import Optional, Any
+import math
+import numpy
+import map
+import triggers
+import profiling
+import viewport
+import vents
 import game_entities.entity
 import game_entities.actor
 import game_entities.tile
@@ -13,6 +20,10 @@ import game_entities.trap
 import game_entities.vent
 
 
+# The width and height in cells of each bucket of the spatial index of live actors.
+BUCKET_SIZE: int = 8
+
+
 class EntityManager:
     """Stores and manages the lists of different game entities."""
 
@@ -29,6 +40,36 @@ class EntityManager:
         self.vents: list[game_entities.vent.Vent] = []
         self.explosives: list[game_entities.explosive.Explosive] = []
         self.player: Optional[game_entities.actor.Player] = None
+        self.game_map: Optional[map.Map] = None
+
+        # Which plane of the floor is drawn, ie: the vents while the player is crawling through them.
+        self.plane: vents.Plane = vents.Plane.FLOOR
+
+        # Times how long each part of a turn takes, when turned on.
+        self.phase_timer: profiling.PhaseTimer = profiling.PhaseTimer()
+        # Profiles every call over the next few turns, when asked to.
+        self.turn_profiler: profiling.TurnProfiler = profiling.TurnProfiler(game_entities.entity.Entity)
+        # Reports on what's taking up memory, when asked to.
+        self.memory_tracker: profiling.MemoryTracker = profiling.MemoryTracker()
+
+        # The time of the latest tick, for anything worked out from the time rather than updated every tick.
+        self.game_time: int = 0
+
+        # Live actors grouped by faction, and by which bucket of the map they are standing in.
+        self.factions: dict[str, set[game_entities.actor.Actor]] = {}
+        self.actor_buckets: dict[tuple[int, int], set[game_entities.actor.Actor]] = {}
+        # Actors that have died, in the order they did.
+        self.corpses: list[game_entities.actor.Actor] = []
+
+        # Cells that call back when an actor steps into or out of them (ie: traps and camera views).
+        self.triggers: triggers.TriggerVolumes = triggers.TriggerVolumes(self)
+
+        # The part of the floor shown on screen, and the entities that never move (like tiles) grouped by bucket, so
+        # only those in view are drawn. Each layer is indexed along with its version at the time, and the version goes
+        # up whenever an entity is added to or removed from the layer.
+        self.viewport: viewport.Viewport = viewport.Viewport()
+        self.render_buckets: dict[str, tuple[int, dict[tuple[int, int], list[game_entities.entity.Entity]]]] = {}
+        self.layer_versions: dict[str, int] = {}
 
         self.window: Any = window
         self.surface: Any = surface
@@ -38,14 +79,35 @@ class EntityManager:
 
         return [entity_ for entity_ in self.all if entity_.x == x and entity_.y == y]
 
-    def get_top_entity_at(self, x: int, y: int, ignore_invis: bool = False) -> Optional[game_entities.entity.Entity]:
-        """Returns the top-most entity on a tile."""
+    def is_on_plane(self, entity_: game_entities.entity.Entity, plane: vents.Plane) -> bool:
+        """Returns whether an entity can be seen from a plane: only the vents and the player from inside the vents, and
+        everything but the vents themselves (other than their entrances) from the floor."""
+
+        if isinstance(entity_, game_entities.vent.Vent):
+            return plane == vents.Plane.VENTS or entity_.entrance
+
+        return plane == vents.Plane.FLOOR or entity_ is self.player
+
+    def get_top_entity_at(
+            self,
+            x: int,
+            y: int,
+            ignore_invis: bool = False,
+            plane: Optional[vents.Plane] = None
+    ) -> Optional[game_entities.entity.Entity]:
+        """Returns the top-most entity on a tile, only counting those that can be seen from a plane if one is given.
+        Returns None if there's nothing there."""
+
+        all_: list[game_entities.entity.Entity] = self.get_all_at(x, y)
+        if plane is not None:
+            all_ = [entity_ for entity_ in all_ if self.is_on_plane(entity_, plane)]
+        if not all_:
+            return None
 
         if not ignore_invis:
-            return self.get_all_at(x, y)[-1]
+            return all_[-1]
         else:
             # Get the top-most entity that is visible.
-            all_: list[game_entities.entity.Entity] = self.get_all_at(x, y)
             all_.reverse()
             for entity_ in all_:
                 if entity_.visible:
@@ -97,44 +159,215 @@ class EntityManager:
                 return vent_
         return None
 
-    def render_all(self, surface: Any) -> None:
-        """Renders all game entities."""
+    def add_live_actor(self, actor_: game_entities.actor.Actor) -> None:
+        """Adds a living actor to its faction and to the spatial index."""
+
+        self.factions.setdefault(actor_.faction, set()).add(actor_)
+        self.actor_buckets.setdefault((actor_.x // BUCKET_SIZE, actor_.y // BUCKET_SIZE), set()).add(actor_)
+        self.triggers.actor_placed(actor_)
+
+    def remove_live_actor(self, actor_: game_entities.actor.Actor) -> None:
+        """Removes an actor from its faction and from the spatial index, ie: when it dies, leaving it as a corpse."""
+
+        self.factions.get(actor_.faction, set()).discard(actor_)
+        self.actor_buckets.get((actor_.x // BUCKET_SIZE, actor_.y // BUCKET_SIZE), set()).discard(actor_)
+        self.triggers.actor_removed(actor_)
+
+        self.corpses.append(actor_)
+        self.layer_changed("corpses")
+
+    def move_live_actor(self, actor_: game_entities.actor.Actor, old_x: int, old_y: int) -> None:
+        """Keeps the spatial index up to date and fires any trigger volumes after an actor moves from old_x, old_y."""
+
+        old_bucket: tuple[int, int] = (old_x // BUCKET_SIZE, old_y // BUCKET_SIZE)
+        new_bucket: tuple[int, int] = (actor_.x // BUCKET_SIZE, actor_.y // BUCKET_SIZE)
+        if old_bucket != new_bucket and actor_ in self.actor_buckets.get(old_bucket, set()):
+            self.actor_buckets[old_bucket].discard(actor_)
+            self.actor_buckets.setdefault(new_bucket, set()).add(actor_)
+
+        self.triggers.actor_moved(actor_, old_x, old_y)
+
+    def is_hostile(self, src_actor: game_entities.actor.Actor, other: game_entities.actor.Actor) -> bool:
+        """Returns whether an actor treats another actor as an enemy."""
+
+        if other is src_actor:
+            return False
+
+        # A turret with friendly fire on shoots at anything that moves.
+        if isinstance(src_actor, game_entities.turret.Turret) and src_actor.friendly_fire:
+            return True
+
+        return other.faction in src_actor.game_data.factions[src_actor.faction]["Hostile"]
+
+    def get_nearest_hostile(
+            self,
+            src_actor: game_entities.actor.Actor,
+            radius: Optional[int] = None,
+            in_sight: bool = False
+    ) -> Optional[game_entities.actor.Actor]:
+        """Returns the closest living actor that src_actor is hostile toward within a radius (or anywhere if no radius
+        is given), only counting those src_actor can see if in_sight is True. Buckets of the spatial index are searched
+        in rings outward from src_actor, stopping as soon as nothing further out could be closer."""
+
+        # Skip the search entirely if no enemy faction has anyone left alive.
+        hostile_factions: list[str] = src_actor.game_data.factions[src_actor.faction]["Hostile"]
+        if not any(self.factions.get(faction) for faction in hostile_factions) and not (
+                isinstance(src_actor, game_entities.turret.Turret) and src_actor.friendly_fire):
+            return None
+
+        if radius is None:
+            radius = math.inf
+
+        origin_x: int = src_actor.x // BUCKET_SIZE
+        origin_y: int = src_actor.y // BUCKET_SIZE
+        max_ring: int = max(self.game_map.width, self.game_map.height) // BUCKET_SIZE + 1
+
+        nearest: Optional[game_entities.actor.Actor] = None
+        nearest_distance: float = math.inf
+        for ring in range(max_ring + 1):
+            # Every cell in this ring of buckets is at least this far away.
+            if max(0, (ring - 1) * BUCKET_SIZE + 1) > min(radius, nearest_distance):
+                break
+
+            for bucket_x in range(origin_x - ring, origin_x + ring + 1):
+                for bucket_y in range(origin_y - ring, origin_y + ring + 1):
+                    # Only look at the outside edge of the ring, the inside has already been searched.
+                    if max(abs(bucket_x - origin_x), abs(bucket_y - origin_y)) != ring:
+                        continue
+
+                    for actor_ in self.actor_buckets.get((bucket_x, bucket_y), ()):
+                        distance: int = max(abs(actor_.x - src_actor.x), abs(actor_.y - src_actor.y))
+                        if distance <= radius and distance < nearest_distance and self.is_hostile(src_actor, actor_) \
+                                and (not in_sight or src_actor.can_see(actor_.x, actor_.y)):
+                            nearest = actor_
+                            nearest_distance = distance
+
+        return nearest
+
+    def layer_changed(self, layer: str) -> None:
+        """Called when an entity is added to or removed from a layer that never moves, so it's indexed again before
+        it's next drawn."""
+
+        self.layer_versions[layer] = self.layer_versions.get(layer, 0) + 1
+
+    def _get_in_view(
+            self,
+            layer: str,
+            entities: list[game_entities.entity.Entity]
+    ) -> list[game_entities.entity.Entity]:
+        """Returns the entities of a layer that never moves which are in the viewport, indexing the layer first if it
+        hasn't been yet or entities have been added to or removed from it since."""
+
+        version: int = self.layer_versions.get(layer, 0)
+        (indexed_version, buckets) = self.render_buckets.get(layer, (-1, {}))
+        if indexed_version != version:
+            buckets = {}
+            for entity_ in entities:
+                buckets.setdefault((entity_.x // BUCKET_SIZE, entity_.y // BUCKET_SIZE), []).append(entity_)
+            self.render_buckets[layer] = (version, buckets)
+
+        in_view: list[game_entities.entity.Entity] = []
+        for bucket in self.viewport.get_buckets(BUCKET_SIZE):
+            in_view.extend(
+                entity_ for entity_ in buckets.get(bucket, ()) if self.viewport.contains(entity_.x, entity_.y)
+            )
+
+        return in_view
+
+    def _get_live_actors_in_view(self) -> list[game_entities.actor.Actor]:
+        """Returns the living actors in the viewport, from the spatial index."""
+
+        in_view: list[game_entities.actor.Actor] = []
+        for bucket in self.viewport.get_buckets(BUCKET_SIZE):
+            in_view.extend(
+                actor_ for actor_ in self.actor_buckets.get(bucket, ()) if self.viewport.contains(actor_.x, actor_.y)
+            )
+
+        return in_view
+
+    def _render_remembered(self, surface: Any, entities: list[game_entities.entity.Entity]) -> None:
+        """Renders entities that never move which are in view, as lit as they are, and dims the ones the player only
+        remembers."""
+
+        visible: numpy.ndarray = self.game_map.fog.visible
+        explored: numpy.ndarray = self.game_map.fog.get_explored()
+        light_map: numpy.ndarray = self.game_map.lighting.get_light_map()
+        for entity_ in entities:
+            if visible[entity_.x, entity_.y] or entity_.bgcolor is not None:
+                entity_.render(surface, min(1.0, float(light_map[entity_.x, entity_.y])))
+            elif explored[entity_.x, entity_.y]:
+                entity_.render(surface, game_entities.entity.REMEMBERED_BRIGHTNESS)
+
+    def _render_seen(self, surface: Any, entities: list[game_entities.entity.Entity]) -> None:
+        """Renders entities in view that move around or come and go, but only those the player can see right now."""
+
+        visible: numpy.ndarray = self.game_map.fog.visible
+        light_map: numpy.ndarray = self.game_map.lighting.get_light_map()
+        for entity_ in entities:
+            if visible[entity_.x, entity_.y] or entity_.bgcolor is not None:
+                entity_.render(surface, min(1.0, float(light_map[entity_.x, entity_.y])))
 
-        for tile_ in self.tiles:
-            tile_.render(surface)
+    def render_all(self, surface: Any) -> None:
+        """Renders all game entities in the viewport that the player can see or remembers."""
+
+        # Only worked out again if the player has moved or the view has changed since the last frame.
+        if self.player is not None:
+            self.game_map.fog.look(self.player.x, self.player.y)
+
+        # From inside the vents, only the vents and the player can be seen.
+        if self.plane == vents.Plane.VENTS:
+            self._render_remembered(surface, self._get_in_view("vents", self.vents))
+            self._render_seen(surface, [self.player] if self.viewport.contains(self.player.x, self.player.y) else [])
+            return
+
+        # From the floor, only the entrances to the vents can be seen.
+        self._render_remembered(surface, self._get_in_view("tiles", self.tiles))
+        self._render_remembered(surface, [vent_ for vent_ in self._get_in_view("vents", self.vents) if vent_.entrance])
+        self._render_remembered(surface, self._get_in_view("cameras", self.cameras))
+        self._render_remembered(surface, self._get_in_view("traps", self.traps))
+        self._render_seen(surface, self._get_in_view("items", self.items))
+        self._render_remembered(surface, self._get_in_view("doors", self.doors))
+        self._render_remembered(surface, self._get_in_view("terminals", self.terminals))
+        self._render_remembered(surface, self._get_in_view("turrets", self.turrets))
+        self._render_seen(surface, self._get_in_view("explosives", self.explosives))
+        self._render_seen(surface, self._get_in_view("corpses", self.corpses))
+        self._render_seen(surface, self._get_live_actors_in_view())
 
-        for vent_ in self.vents:
-            vent_.render(surface)
+    def update_all(self, game_time: int) -> None:
+        """Called every tick of time to update all entities."""
 
-        for camera_ in self.cameras:
-            camera_.render(surface)
+        with self.phase_timer.phase("entities"):
+            self.game_time = game_time
 
-        for trap_ in self.traps:
-            trap_.render(surface)
+            for entity_ in self.all:
+                entity_.update(game_time)
 
-        for item_ in self.items:
-            item_.render(surface)
+            self.game_map.noise_field.end_tick()
 
-        for door_ in self.doors:
-            door_.render(surface)
+    def skip_idle_ticks(self, game_time: int, max_ticks: float = math.inf) -> int:
+        """Skips ahead over every tick after game_time (up to max_ticks) where no entity would do anything but count
+        down, and returns how many were skipped."""
 
-        for terminal_ in self.terminals:
-            terminal_.render(surface)
+        # Only these entities do anything when updated, the rest never need to be asked.
+        updated: list[game_entities.entity.Entity] = self.actors + self.cameras + self.explosives
 
-        for turret_ in self.turrets:
-            turret_.render(surface)
+        ticks: float = max_ticks
+        for entity_ in updated:
+            ticks = min(ticks, entity_.get_idle_ticks(game_time))
+            if ticks <= 0:
+                return 0
 
-        for explosive_ in self.explosives:
-            explosive_.render(surface)
+        if ticks == math.inf:
+            return 0
 
-        for actor_ in self.actors:
-            actor_.render(surface)
+        self.game_time = game_time + int(ticks)
+        for entity_ in updated:
+            entity_.skip_ticks(int(ticks))
 
-    def update_all(self, game_time: int) -> None:
-        """Called every tick of time to update all entities."""
+        # Nothing makes noise while idle, so anything still heard has died down by now.
+        self.game_map.noise_field.end_tick()
 
-        for entity_ in self.all:
-            entity_.update(game_time)
+        return int(ticks)
 
     def reset(self) -> None:
         """Clears and resets all the lists."""
@@ -143,22 +376,14 @@ class EntityManager:
         self.actors = []
         self.doors = []
         self.items = []
+        self.factions = {}
+        self.actor_buckets = {}
+        self.corpses = []
+        self.triggers = triggers.TriggerVolumes(self)
+        self.render_buckets = {}
+        self.plane = vents.Plane.FLOOR
 
-    def show_vents(self) -> None:
-        """Reveals the vents and hides everything else."""
-
-        for entity_ in self.all:
-            if isinstance(entity_, game_entities.vent.Vent) or isinstance(entity_, game_entities.actor.Player):
-                entity_.visible = True
-            else:
-                entity_.old_visible = entity_.visible  # Store the current visibility.
-                entity_.visible = False
-
-    def hide_vents(self):
-        """Hides the vents and reveals everything else."""
+    def set_plane(self, plane: vents.Plane) -> None:
+        """Switches which plane of the floor is drawn, ie: when the player crawls into or out of the vents."""
 
-        for entity_ in self.all:
-            if isinstance(entity_, game_entities.vent.Vent) and not entity_.entrance:
-                entity_.visible = False
-            else:
-                entity_.visible = entity_.old_visible  # In case the entity was previously invisible.
+        self.plane = plane
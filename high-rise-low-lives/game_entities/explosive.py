@@ -40,32 +40,34 @@ class Explosive(Entity):
         self.blast_radius = blast_radius
 
         game_entities_.explosives.append(self)
+        game_entities_.layer_changed("explosives")
 
     def explode(self) -> None:
         """Called after the fuse has run out and unleashes an explosion."""
 
-        # Used to keep track of actors receiving damage so they don't get hit twice.
-        actors_hit: list[Actor] = []
+        with self.game_entities.phase_timer.phase("explosions"):
+            # Used to keep track of actors receiving damage so they don't get hit twice.
+            actors_hit: list[Actor] = []
 
-        # Grows the explosion out to its max blast radius.
-        for i in range(self.blast_radius + 1):
-            blast_zone: list[tuple[int, int]]
-            if i == 0:
-                # The explosion is directly under an actor.
-                blast_zone = [(self.x, self.y)]
-            else:
-                blast_zone = self.compute_fov(i, False)
+            # Grows the explosion out to its max blast radius.
+            for i in range(self.blast_radius + 1):
+                blast_zone: list[tuple[int, int]]
+                if i == 0:
+                    # The explosion is directly under an actor.
+                    blast_zone = [(self.x, self.y)]
+                else:
+                    blast_zone = self.compute_fov(i, False)
 
-            # Check each point in the blast zone to see if it hit an actor.
-            for point in blast_zone:
-                actor_: Actor = self.game_entities.get_actor_at(point[0], point[1])
-                if actor_ is not None and actor_.health >= 0 and actor_ not in actors_hit:
-                    actor_.receive_hit(self, round(self.damage / (i + 1)), 100)
-                    actors_hit.append(actor_)
+                # Check each point in the blast zone to see if it hit an actor.
+                for point in blast_zone:
+                    actor_: Actor = self.game_entities.get_actor_at(point[0], point[1])
+                    if actor_ is not None and actor_.health >= 0 and actor_ not in actors_hit:
+                        actor_.receive_hit(self, round(self.damage / (i + 1)), 100)
+                        actors_hit.append(actor_)
 
-            self.render_projectile(blast_zone, '*', self.game_data.colors["RED"], 0.05)
+                self.render_projectile(blast_zone, '*', self.game_data.colors["RED"], 0.05)
 
-        self.remove()
+            self.remove()
 
     def update(self, game_time: int) -> None:
         """Updates the explosive."""
@@ -75,6 +77,16 @@ class Explosive(Entity):
         if self.fuse <= 0:
             self.explode()
 
+    def get_idle_ticks(self, game_time: int) -> float:
+        """The explosive just burns its fuse until the tick it goes off."""
+
+        return max(self.fuse - 1, 0)
+
+    def skip_ticks(self, ticks: int) -> None:
+        """Burns down the fuse."""
+
+        self.fuse -= ticks
+
     def remove(self) -> None:
         """Removes the explosive from the list of all explosives."""
 
@@ -83,4 +95,5 @@ class Explosive(Entity):
             if explosive_[1] is self:
                 explosives.pop(explosive_[0])
 
+        self.game_entities.layer_changed("explosives")
         super().remove()
@@ -27,6 +27,7 @@ class ItemEntity(Entity):
         self.item: items.Item = item_  # The actual item this entity represents.
 
         game_entities_.items.append(self)
+        game_entities_.layer_changed("items")
 
     def actor_pick_up(self, actor_: Actor, amount: int = 1) -> items.Item:
         """Called when the actor picks up the item entity."""
@@ -44,4 +45,5 @@ class ItemEntity(Entity):
             if item_[1] is self:
                 game_items.pop(item_[0])
 
+        self.game_entities.layer_changed("items")
         super().remove()
@@ -44,6 +44,7 @@ class Terminal(Entity):
         self._choose_results()
 
         game_entities_.terminals.append(self)
+        game_entities_.layer_changed("terminals")
 
     def _choose_results(self) -> None:
         """This will eventually decide randomly which and how many success/fail results to generate for this terminal.
@@ -56,8 +57,9 @@ class Terminal(Entity):
     def _unlock_doors(self) -> None:
         """Unlocks all doors on the current floor."""
 
-        for door_ in self.game_entities.doors:
-            door_.locked = False
+        # Only the locked ones need touching, and each one unlocked just joins up the zones either side of it.
+        for door_ in self.game_entities.game_map.zones.get_locked_doors():
+            door_.unlock()
 
         self.game_interface.message_box.add_msg(
             f"All doors unlocked.", self.game_data.colors["SYS_MSG"]
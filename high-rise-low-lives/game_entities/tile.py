@@ -21,7 +21,8 @@ class Tile(Entity):
             game_entities_: GameEntities,
             game_interface: interface.Interface,
             cover_percent: int = 0,
-            visible: bool = True
+            visible: bool = True,
+            in_tiles: bool = True
     ) -> None:
         super().__init__(
             x,
@@ -38,4 +39,7 @@ class Tile(Entity):
             visible
         )
 
-        game_entities_.tiles.append(self)
+        # Tiles on a plane of their own (ie: vents) aren't drawn along with the floor's tiles.
+        if in_tiles:
+            game_entities_.tiles.append(self)
+            game_entities_.layer_changed("tiles")
@@ -1,6 +1,7 @@
 from __future__ import annotations
 import interface
 import databases
+import triggers
 from .entities import GameEntities
 from .entity import Entity
 
@@ -35,7 +36,18 @@ class Trap(Entity):
 
         self.triggered: bool = False
 
+        # Spring the trap as soon as someone steps onto it.
+        self.game_entities.triggers.add(triggers.TriggerVolume(self, {(self.x, self.y)}, self._on_enter))
+
         self.game_entities.traps.append(self)
+        self.game_entities.layer_changed("traps")
+
+    def _on_enter(self, actor_: Entity) -> None:
+        """Called when an actor steps onto the trap."""
+
+        # For now only the player sets off traps.
+        if actor_.faction == "PLAYER":
+            self.trigger()
 
     def trigger(self) -> None:
         """Triggers the trap and performs some action."""
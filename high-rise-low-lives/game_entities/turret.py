@@ -2,6 +2,7 @@ from __future__ import annotations
 import databases
 import interface
 import ai
+import triggers
 from .entities import GameEntities
 from .actor import Actor
 
@@ -39,7 +40,21 @@ class Turret(Actor):
             self.turret_data["Color"],
             game_data,
             game_entities_,
-            game_interface
+            game_interface,
+            self.turret_data["Faction"]
+        )
+
+        # Keep track of who is close enough to shoot at instead of checking distances every time the turret thinks.
+        self.range: int = 4
+        self.actors_in_range: set[Actor] = set()
+        engagement_zone: set[tuple[int, int]] = {
+            (zone_x, zone_y)
+            for zone_x in range(self.x - self.range, self.x + self.range + 1)
+            for zone_y in range(self.y - self.range, self.y + self.range + 1)
+        }
+        self.game_entities.triggers.add(
+            triggers.TriggerVolume(self, engagement_zone, self.actors_in_range.add, self.actors_in_range.discard)
         )
 
         self.game_entities.turrets.append(self)
+        self.game_entities.layer_changed("turrets")
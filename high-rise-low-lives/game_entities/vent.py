@@ -18,14 +18,7 @@ class Vent(Tile):
             entrance: bool = False
     ) -> None:
         self.entrance: bool = entrance  # Whether or not this is an entrance vent.
-        visible: bool = True
-        tile_: dict
-
-        if self.entrance:
-            tile_ = game_data.tiles["VENT_ENTER"]
-        else:
-            tile_ = game_data.tiles["VENT"]
-            visible = False
+        tile_: dict = game_data.tiles["VENT_ENTER"] if self.entrance else game_data.tiles["VENT"]
 
         super().__init__(
             x,
@@ -39,7 +32,9 @@ class Vent(Tile):
             game_entities_,
             game_interface,
             tile_["Cover Percent"],
-            visible
+            # The vents are a plane of their own, so they aren't drawn along with the floor's tiles.
+            in_tiles=False
         )
 
         game_entities_.vents.append(self)
+        game_entities_.layer_changed("vents")
@@ -1,7 +1,13 @@
 from __future__ import annotations
-from typing import Any, Union, Optional
+from typing import Any, Callable, Union, Optional
+import time
+import bot
 import game_engine
 import game_entities.entity
+import game_entities.actor
+import inventory
+import map
+import profiling
 import rendering
 import input
 
@@ -37,6 +43,16 @@ class BaseState:
 
         pass
 
+    def is_busy(self) -> bool:
+        """Returns whether the state is in the middle of something that doesn't need input, ie: the player running."""
+
+        return False
+
+    def interrupt(self) -> None:
+        """Called when a key is pressed while the state is busy, to stop what it's doing."""
+
+        pass
+
 
 class PlayingState(BaseState):
     """The state when the player is actually playing the game."""
@@ -47,16 +63,287 @@ class PlayingState(BaseState):
         self.game_time: int = 0
         self.floor_on: int = 1
 
+        # Something the player keeps doing turn after turn without input, like running or exploring.
+        # It's called for each turn and returns whether to carry on.
+        self.activity: Optional[Callable[[], bool]] = None
+        # What the player could see and their health when the activity started, to stop when either changes.
+        self.activity_in_view: set[game_entities.actor.Actor] = set()
+        self.activity_health: int = 0
+        # What the player could hear when the activity started and how loud each was, to stop when something new (or
+        # louder) is heard. Something that was already going, like an alarm, doesn't stop it.
+        self.activity_noises: dict[Any, int] = {}
+
+        # The direction the player is running in.
+        self.run_direction: tuple[int, int] = (0, 0)
+
+        # How many more times the player will rest, and whether to stop once they're healed.
+        self.rests_left: int = 0
+        self.rest_until_healed: bool = False
+        # The most the player rests in one go when just waiting for something to happen.
+        self.MAX_RESTS: int = 100
+
+        # Where the phase timer's trace is saved when it's turned off.
+        self.TRACE_FILE: str = "trace.json"
+        # How many turns to profile when no count is typed first.
+        self.PROFILE_TURNS: int = 100
+
+        # Plays as the player for a number of turns, ie: to leave a game running on its own. Only made the first time
+        # it's needed, since the select states share this __init__ and never use it.
+        self.bot: Optional[bot.Bot] = None
+        self.bot_turns: int = 0
+        # How many turns the bot plays when no count is typed first.
+        self.BOT_TURNS: int = 100
+
+        # Digits typed before a command, ie: 20. to rest 20 times.
+        self.count: str = ''
+
+        # The longest to keep going before drawing a frame, so a long activity doesn't look frozen.
+        self.ACTIVITY_FRAME_TIME: float = 1 / 30
+
+    def _pass_time(self) -> None:
+        """Updates the game every round while the player cools down from action."""
+
+        if self.engine.player.action_cooldown < 0:
+            return
+
+        while self.engine.player.action_cooldown >= 0:
+            # Jump straight past any ticks where everyone is just cooling down.
+            self.game_time += self.engine.entities.skip_idle_ticks(self.game_time)
+
+            self.game_time += 1
+            self.engine.entities.update_all(self.game_time)
+
+        if self.engine.entities.turn_profiler.end_turn():
+            self.engine.game_interface.message_box.add_msg(
+                f"Profile of the last {self.engine.entities.turn_profiler.turns} turns saved to "
+                f"{self.engine.entities.turn_profiler.prefix}.*",
+                self.engine.game_data.colors["SYS_MSG"]
+            )
+
+    def _get_actors_in_view(self) -> set[game_entities.actor.Actor]:
+        """Returns every other living actor the player can see."""
+
+        return {
+            actor_ for actor_ in self.engine.entities.actors
+            if actor_ is not self.engine.player and actor_.health > 0 and
+            self.engine.player.can_see(actor_.x, actor_.y)
+        }
+
+    def _is_interrupted(self) -> bool:
+        """Returns whether anything came up that should stop the player's activity: they got hurt, heard something or
+        someone came into view."""
+
+        player_: game_entities.actor.Player = self.engine.player
+        noises: dict[Any, int] = self.engine.entities.game_map.noise_field.get_sources(player_.x, player_.y)
+        return player_.health < self.activity_health or \
+            any(volume > self.activity_noises.get(emitter, 0) for (emitter, volume) in noises.items()) or \
+            not self._get_actors_in_view() <= self.activity_in_view
+
+    def _is_blocked(self, x: int, y: int) -> bool:
+        """Returns whether stepping onto a cell would do more than move, like opening a door, hacking or attacking."""
+
+        actor_: Optional[game_entities.actor.Actor] = self.engine.entities.get_actor_at(x, y)
+        return self.engine.entities.get_door_at(x, y) is not None or \
+            self.engine.entities.get_terminal_at(x, y) is not None or \
+            (actor_ is not None and actor_.health > 0)
+
+    def start_activity(self, activity: Callable[[], bool]) -> None:
+        """Starts the player doing something turn after turn, unless an enemy is in view."""
+
+        in_view: set[game_entities.actor.Actor] = self._get_actors_in_view()
+        if any(self.engine.entities.is_hostile(self.engine.player, actor_) for actor_ in in_view):
+            self.engine.game_interface.message_box.add_msg(
+                "Not with enemies in view!", self.engine.game_data.colors["ERROR_MSG"]
+            )
+            return
+
+        self.activity = activity
+        self.activity_in_view = in_view
+        self.activity_health = self.engine.player.health
+        self.activity_noises = self.engine.entities.game_map.noise_field.get_sources(
+            self.engine.player.x, self.engine.player.y
+        )
+
+    def stop_activity(self) -> None:
+        """Stops whatever the player is doing."""
+
+        self.activity = None
+
+    def _get_run_direction(self) -> Optional[tuple[int, int]]:
+        """Returns which way to keep running, following a corridor around corners, or None if the way is blocked."""
+
+        player_: game_entities.actor.Player = self.engine.player
+        game_map: Any = self.engine.entities.game_map
+
+        def is_open(direction: tuple[int, int]) -> bool:
+            x: int = player_.x + direction[0]
+            y: int = player_.y + direction[1]
+            # The vents can't be walked on, so in there the way is open only where the vents go.
+            if player_.in_vents:
+                return game_map.vent_network.is_vent(x, y)
+            return game_map.in_bounds(x, y) and game_map.move_costs[x][y] > 0
+
+        if is_open(self.run_direction):
+            return self.run_direction
+
+        # Turn only if there's just one way to go besides back, and the corner between back and that way is closed off,
+        # ie: a bend in a corridor rather than the corner of a room.
+        (dx, dy) = self.run_direction
+        turns: list[tuple[int, int]] = [turn for turn in ((dy, dx), (-dy, -dx)) if is_open(turn)]
+        if len(turns) != 1 or is_open((turns[0][0] - dx, turns[0][1] - dy)):
+            return None
+        return turns[0]
+
+    def start_running(self, dx: int, dy: int) -> None:
+        """Starts the player running in a direction until something interesting happens."""
+
+        self.run_direction = (dx, dy)
+        self.start_activity(self._run_step)
+
+    def _run_step(self) -> bool:
+        """Takes a single step of a run. Stops in front of anything that isn't a simple move, on items, when getting
+        into or out of the vents and when the way ends."""
+
+        player_: game_entities.actor.Player = self.engine.player
+        direction: Optional[tuple[int, int]] = self._get_run_direction()
+        if direction is None or self._is_blocked(player_.x + direction[0], player_.y + direction[1]):
+            return False
+
+        self.run_direction = direction
+        (old_x, old_y, in_vents) = (player_.x, player_.y, player_.in_vents)
+        if not player_.attempt_move(direction[0], direction[1]):
+            return False
+
+        self._pass_time()
+
+        return (player_.x, player_.y) != (old_x, old_y) and player_.in_vents == in_vents and \
+            not self.engine.entities.get_items_at(player_.x, player_.y)
+
+    def start_exploring(self) -> None:
+        """Starts the player exploring the floor on their own."""
+
+        self.start_activity(self._explore_step)
+
+    def _explore_step(self) -> bool:
+        """Takes a single step toward the nearest place not seen yet or item not picked up yet. Stops on items and
+        once there's nowhere left to go."""
+
+        player_: game_entities.actor.Player = self.engine.player
+        direction: Optional[tuple[int, int]] = self.engine.entities.game_map.explorer.get_step(player_.x, player_.y)
+        if direction is None:
+            self.engine.game_interface.message_box.add_msg(
+                "There's nothing left to explore.", self.engine.game_data.colors["SYS_MSG"]
+            )
+            return False
+
+        # Doors are opened along the way, but nobody gets attacked or hacked.
+        next_x: int = player_.x + direction[0]
+        next_y: int = player_.y + direction[1]
+        if self._is_blocked(next_x, next_y) and self.engine.entities.get_door_at(next_x, next_y) is None:
+            return False
+
+        if not player_.attempt_move(direction[0], direction[1]):
+            return False
+
+        self._pass_time()
+
+        return not self.engine.entities.get_items_at(player_.x, player_.y)
+
+    def start_resting(self, rests: int = 0, until_healed: bool = False) -> None:
+        """Starts the player resting a number of times, or until they're healed, or until something happens if neither
+        is given."""
+
+        self.rests_left = rests if rests > 0 else self.MAX_RESTS
+        self.rest_until_healed = until_healed
+        self.start_activity(self._rest_step)
+
+    def _rest_step(self) -> bool:
+        """Rests once. Stops when out of rests or healed."""
+
+        player_: game_entities.actor.Player = self.engine.player
+        if self.rests_left <= 0 or (self.rest_until_healed and player_.health >= 100):
+            return False
+
+        self.rests_left -= 1
+        player_.attempt_rest()
+        self._pass_time()
+
+        return True
+
+    def toggle_profiler(self) -> None:
+        """Turns the phase timer and its overlay on or off. Turning it off saves what was timed as a Chrome trace."""
+
+        timer: profiling.PhaseTimer = self.engine.entities.phase_timer
+        timer.toggle()
+
+        if not timer.enabled:
+            timer.export_trace(self.TRACE_FILE)
+            self.engine.game_interface.message_box.add_msg(
+                f"Profiler trace saved to {self.TRACE_FILE}.", self.engine.game_data.colors["SYS_MSG"]
+            )
+
+    def start_profiling(self, turns: int) -> None:
+        """Profiles every call made over the next few turns."""
+
+        if self.engine.entities.turn_profiler.is_running():
+            self.engine.game_interface.message_box.add_msg(
+                "Already profiling!", self.engine.game_data.colors["ERROR_MSG"]
+            )
+            return
+
+        self.engine.entities.turn_profiler.start(turns)
+        self.engine.game_interface.message_box.add_msg(
+            f"Profiling the next {turns} turns...", self.engine.game_data.colors["SYS_MSG"]
+        )
+
+    def start_bot(self, turns: int) -> None:
+        """Lets the bot play as the player for a number of turns."""
+
+        self.stop_activity()
+        if self.bot is None:
+            self.bot = bot.Bot(self.engine.entities.game_map)
+        self.bot_turns = turns
+
+    def interrupt(self) -> None:
+        """Stops the player doing something on their own, and the bot playing for them."""
+
+        self.stop_activity()
+        self.bot_turns = 0
+
+    def is_busy(self) -> bool:
+        """The Playing state doesn't need input while the player is doing something on their own."""
+
+        return self.activity is not None or self.bot_turns > 0
+
+    def get_focus(self) -> tuple[int, int]:
+        """Returns the map cell the viewport should keep in view."""
+
+        return self.engine.player.x, self.engine.player.y
+
     def handle_rendering(self, surface: Any) -> None:
         """Handles rendering for the Playing state."""
 
+        (focus_x, focus_y) = self.get_focus()
+        game_map: map.Map = self.engine.entities.game_map
+        self.engine.entities.viewport.show(focus_x, focus_y, game_map.width, game_map.height)
+
         self.engine.game_interface.stats_box.render(surface)
         self.engine.game_interface.message_box.render(surface)
         self.engine.entities.render_all(surface)
 
+        if self.engine.entities.phase_timer.enabled:
+            self.engine.game_interface.profiler_box.render(surface, self.engine.entities.phase_timer)
+
     def handle_input(self, key: Union[input.Key, str]) -> None:
         """Handles input for the Playing state."""
 
+        # Keep track of digits typed before a command.
+        if isinstance(key, str) and key.isdigit():
+            self.count = (self.count + key)[-3:]
+            return
+        count: int = int(self.count) if self.count else 0
+        self.count = ''
+
         if key == input.Key.UP:
             self.engine.player.attempt_move(0, -1)
         elif key == input.Key.DOWN:
@@ -65,12 +352,43 @@ class PlayingState(BaseState):
             self.engine.player.attempt_move(-1, 0)
         elif key == input.Key.RIGHT:
             self.engine.player.attempt_move(1, 0)
+        elif key == input.Key.SHIFT_UP:
+            self.start_running(0, -1)
+        elif key == input.Key.SHIFT_DOWN:
+            self.start_running(0, 1)
+        elif key == input.Key.SHIFT_LEFT:
+            self.start_running(-1, 0)
+        elif key == input.Key.SHIFT_RIGHT:
+            self.start_running(1, 0)
+        elif key == 'o':
+            self.start_exploring()
+        elif key == 'P':
+            self.toggle_profiler()
+        elif key == 'C':
+            self.start_profiling(count or self.PROFILE_TURNS)
+        elif key == 'B':
+            self.start_bot(count or self.BOT_TURNS)
+        elif key == 'M':
+            path: str = self.engine.entities.memory_tracker.report(self.engine.entities)
+            self.engine.game_interface.message_box.add_msg(
+                f"Memory report saved to {path}.", self.engine.game_data.colors["SYS_MSG"]
+            )
         elif key == input.Key.PERIOD:
-            self.engine.player.attempt_rest()
+            if count:
+                self.start_resting(count)
+            else:
+                self.engine.player.attempt_rest()
+        elif key == 'R':
+            # Rest until healed, or just until something happens if already healthy.
+            self.start_resting(until_healed=self.engine.player.health < 100)
         elif key == input.Key.COMMA:
             self.engine.player.attempt_pickup()
         elif key == input.Key.CTRL_C:
             self.engine.player.attempt_close_door()
+        elif key == input.Key.PAGE_UP:
+            self.engine.game_interface.message_box.scroll_by(1)
+        elif key == input.Key.PAGE_DOWN:
+            self.engine.game_interface.message_box.scroll_by(-1)
         elif key == 'w':
             self.engine.set_state(self.engine.wield_screen_state)
         elif key == 'i':
@@ -91,10 +409,19 @@ class PlayingState(BaseState):
     def handle_updates(self) -> None:
         """Handles updates for the Playing state."""
 
-        # Updates the game every round while the player cools down from action.
-        while self.engine.player.action_cooldown >= 0:
-            self.game_time += 1
-            self.engine.entities.update_all(self.game_time)
+        self._pass_time()
+
+        # Do as many turns of an activity as fit in a frame, then let the engine draw before carrying on.
+        frame_start: float = time.perf_counter()
+        while self.activity is not None and time.perf_counter() - frame_start < self.ACTIVITY_FRAME_TIME:
+            if not self.activity() or self._is_interrupted():
+                self.stop_activity()
+
+        # The bot isn't stopped by seeing enemies or getting hurt like an activity is, that's what it's there for.
+        while self.bot_turns > 0 and time.perf_counter() - frame_start < self.ACTIVITY_FRAME_TIME:
+            self.bot.act(self.engine.player)
+            self._pass_time()
+            self.bot_turns -= 1
 
         self.engine.game_interface.stats_box.update(self.game_time, self.floor_on)
 
@@ -118,11 +445,10 @@ class WieldScreenState(BaseState):
             self.engine.player.attempt_wield(None)
             self.engine.reverse_state()
 
-        for wieldable in self.engine.player.get_wieldable_items():
-            if wieldable[0] == key:
-                self.engine.player.attempt_wield(wieldable[1]["Item"])
-                self.engine.reverse_state()
-                return
+        wieldable: Optional[dict] = self.engine.player.inventory.get_slot(key, inventory.Inventory.Category.WIELDABLE)
+        if wieldable is not None:
+            self.engine.player.attempt_wield(wieldable["Item"])
+            self.engine.reverse_state()
 
 
 class InventoryScreenState(BaseState):
@@ -139,11 +465,10 @@ class InventoryScreenState(BaseState):
     def handle_input(self, key: Union[input.Key, str]) -> None:
         """Handles input for the InventoryScreen state."""
 
-        for item in self.engine.player.inventory.items():
-            if item[0] == key:
-                self.engine.player.examine_target = item[1]["Item"]
-                self.engine.set_state(self.engine.desc_screen_state)
-                return
+        item: Optional[dict] = self.engine.player.inventory.get_slot(key)
+        if item is not None:
+            self.engine.player.examine_target = item["Item"]
+            self.engine.set_state(self.engine.desc_screen_state)
 
 
 class ThrowScreenState(BaseState):
@@ -160,11 +485,10 @@ class ThrowScreenState(BaseState):
     def handle_input(self, key: Union[input.Key, str]) -> None:
         """Handles input for the ThrowScreen state."""
 
-        for throwable in self.engine.player.get_throwable_items():
-            if throwable[0] == key:
-                self.engine.player.item_selected = throwable[1]["Item"]
-                self.engine.set_state(self.engine.select_throw_state)
-                return
+        throwable: Optional[dict] = self.engine.player.inventory.get_slot(key, inventory.Inventory.Category.THROWABLE)
+        if throwable is not None:
+            self.engine.player.item_selected = throwable["Item"]
+            self.engine.set_state(self.engine.select_throw_state)
 
 
 class DescScreenState(BaseState):
@@ -193,11 +517,9 @@ class DrugScreenState(BaseState):
     def handle_input(self, key: Union[input.Key, str]) -> None:
         """Handles input for the DrugScreen state."""
 
-        for drug in self.engine.player.get_drug_items():
-            if drug[0] == key:
-                self.engine.player.attempt_use_drug(drug[0])
-                self.engine.set_state(self.engine.playing_state)
-                return
+        if self.engine.player.inventory.get_slot(key, inventory.Inventory.Category.DRUG) is not None:
+            self.engine.player.attempt_use_drug(key)
+            self.engine.set_state(self.engine.playing_state)
 
 
 class ChargeScreenState(BaseState):
@@ -214,11 +536,9 @@ class ChargeScreenState(BaseState):
     def handle_input(self, key: Union[input.Key, str]) -> None:
         """Handles input for the ChargeScreen state."""
 
-        for powersrc in self.engine.player.get_power_sources():
-            if powersrc[0] == key:
-                self.engine.player.attempt_charge(powersrc[0])
-                self.engine.set_state(self.engine.playing_state)
-                return
+        if self.engine.player.inventory.get_slot(key, inventory.Inventory.Category.POWER_SOURCE) is not None:
+            self.engine.player.attempt_charge(key)
+            self.engine.set_state(self.engine.playing_state)
 
 
 class SelectState(PlayingState):
@@ -234,9 +554,11 @@ class SelectState(PlayingState):
     def _highlight_entity(self, color: Optional[tuple[int, int, int]]) -> None:
         """Sets the background color of a selected entity in order to 'highlight' it."""
 
-        top_entity: game_entities.entity.Entity = self.engine.entities.get_top_entity_at(self.select_x,
-                                                                                         self.select_y, True)
-        top_entity.highlight(color)
+        top_entity: Optional[game_entities.entity.Entity] = self.engine.entities.get_top_entity_at(
+            self.select_x, self.select_y, True, self.engine.entities.plane
+        )
+        if top_entity is not None:
+            top_entity.highlight(color)
 
     def enter(self) -> None:
         """Called when the Select state is entered."""
@@ -250,8 +572,14 @@ class SelectState(PlayingState):
 
         self._highlight_entity(None)
 
+    def get_focus(self) -> tuple[int, int]:
+        """The viewport follows the cursor instead of the player."""
+
+        return self.select_x, self.select_y
+
     def move_cursor(self, key: Union[input.Key, str]) -> None:
-        """Moves a 'cursor' by highlighting an entity as the user presses the arrow keys."""
+        """Moves a 'cursor' by highlighting an entity as the user presses the arrow keys.
+        The cursor can go anywhere on the floor, with the viewport scrolling to keep it on screen."""
 
         if (key != input.Key.UP and key != input.Key.DOWN and
                 key != input.Key.RIGHT and key != input.Key.LEFT):
@@ -265,14 +593,14 @@ class SelectState(PlayingState):
             else:
                 return
         elif key == input.Key.DOWN:
-            if self.select_y < (self.engine.MAP_HEIGHT - 1):
+            if self.select_y < (self.engine.entities.game_map.height - 1):
                 self._highlight_entity(None)
                 self.select_y += 1
                 self._highlight_entity(self.engine.game_data.colors["HIGHLIGHT"])
             else:
                 return
         elif key == input.Key.RIGHT:
-            if self.select_x < (self.engine.MAP_WIDTH - 1):
+            if self.select_x < (self.engine.entities.game_map.width - 1):
                 self._highlight_entity(None)
                 self.select_x += 1
                 self._highlight_entity(self.engine.game_data.colors["HIGHLIGHT"])
@@ -286,6 +614,9 @@ class SelectState(PlayingState):
             else:
                 return
 
+        game_map: map.Map = self.engine.entities.game_map
+        self.engine.entities.viewport.show(self.select_x, self.select_y, game_map.width, game_map.height)
+
 
 class ExamineState(SelectState):
     """The state when the player is selecting something to examine while playing."""
@@ -297,9 +628,11 @@ class ExamineState(SelectState):
         """Handles input for the Examine state."""
 
         if key == 'v':
-            self.engine.player.examine_target = \
-                self.engine.entities.get_top_entity_at(self.select_x, self.select_y, True)
-            self.engine.set_state(self.engine.desc_screen_state)
+            self.engine.player.examine_target = self.engine.entities.get_top_entity_at(
+                self.select_x, self.select_y, True, self.engine.entities.plane
+            )
+            if self.engine.player.examine_target is not None:
+                self.engine.set_state(self.engine.desc_screen_state)
 
         self.move_cursor(key)
 
@@ -329,8 +662,10 @@ class SelectTargetState(SelectState):
 
         # Draws a line along the bullet path.
         for point in self.engine.player.bullet_path:
-            # Later remove hard-coded color and character.
-            rendering.render(surface, '*', point[0], point[1], self.engine.game_data.colors["RED"])
+            if self.engine.entities.viewport.contains(point[0], point[1]):
+                (screen_x, screen_y) = self.engine.entities.viewport.to_screen(point[0], point[1])
+                # Later remove hard-coded color and character.
+                rendering.render(surface, '*', screen_x, screen_y, self.engine.game_data.colors["RED"])
 
     def handle_input(self, key: Union[input.Key, str]) -> None:
         """Handles input for the SelectTarget state."""
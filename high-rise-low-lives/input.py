@@ -22,7 +22,13 @@ class Key(Enum):
     DOWN = auto(),
     COMMA = auto(),
     PERIOD = auto(),
-    MINUS = auto()
+    MINUS = auto(),
+    PAGE_UP = auto(),
+    PAGE_DOWN = auto(),
+    SHIFT_UP = auto(),
+    SHIFT_RIGHT = auto(),
+    SHIFT_LEFT = auto(),
+    SHIFT_DOWN = auto()
 
 
 def poll_input() -> tuple[EventType, Optional[Union[Key, str]]]:
@@ -47,7 +53,16 @@ def poll_input() -> tuple[EventType, Optional[Union[Key, str]]]:
         tcod.event.K_LEFT: Key.LEFT,
         tcod.event.K_COMMA: Key.COMMA,
         tcod.event.K_PERIOD: Key.PERIOD,
-        tcod.event.K_MINUS: Key.MINUS
+        tcod.event.K_MINUS: Key.MINUS,
+        tcod.event.K_PAGEUP: Key.PAGE_UP,
+        tcod.event.K_PAGEDOWN: Key.PAGE_DOWN
+    }
+
+    shift_keys: dict = {
+        Key.UP: Key.SHIFT_UP,
+        Key.DOWN: Key.SHIFT_DOWN,
+        Key.RIGHT: Key.SHIFT_RIGHT,
+        Key.LEFT: Key.SHIFT_LEFT
     }
 
     event_ = next(tcod.event.wait())
@@ -56,6 +71,10 @@ def poll_input() -> tuple[EventType, Optional[Union[Key, str]]]:
     if event_type == EventType.KEYDOWN:
         event_key = keys.get(event_.sym)
 
+        # Shift+arrow keys run.
+        if event_key in shift_keys and event_.mod & tcod.event.KMOD_SHIFT:
+            event_key = shift_keys[event_key]
+
         # If key is a-z return the actual character instead of a Key.
         if tcod.event.K_a <= event_.sym <= tcod.event.K_z:
             event_key = chr(int(event_.sym))
@@ -69,4 +88,24 @@ def poll_input() -> tuple[EventType, Optional[Union[Key, str]]]:
                 if event_.sym == tcod.event.K_c:
                     event_key = Key.CTRL_C
 
+        # If key is 0-9 return the digit, ie: for counts typed before a command.
+        elif tcod.event.K_0 <= event_.sym <= tcod.event.K_9:
+            event_key = chr(int(event_.sym))
+
     return event_type, event_key
+
+
+def poll_pending() -> list[EventType]:
+    """Generic input poller that doesn't wait, and returns the type of every event that has come in since it was last
+    called, throwing the events themselves away. Keys held down and repeating aren't counted as being pressed."""
+
+    # if TCOD:
+    events: dict = {
+        "KEYDOWN": EventType.KEYDOWN,
+        "QUIT": EventType.QUIT
+    }
+
+    return [
+        events[event_.type] for event_ in tcod.event.get()
+        if event_.type in events and not getattr(event_, "repeat", False)
+    ]
@@ -1,7 +1,11 @@
 from __future__ import annotations
 from typing import Optional, Union, Any
+from collections import deque
+from itertools import islice
+import textwrap
 import rendering
 import game_entities.actor
+import profiling
 
 
 class Interface:
@@ -33,6 +37,7 @@ class Interface:
             self.map_w + 1,
             self.screen_h - self.map_h
         )
+        self.profiler_box: Interface.ProfilerBox = self.ProfilerBox(self.map_w + 3, 25)
 
     class DescriptionScreen:
         def __init__(self, x: int = 0, y: int = 0) -> None:
@@ -48,8 +53,8 @@ class Interface:
             self.x: int = x
             self.y: int = y
 
+        # Items are expected to already be sorted, ie: a view from an Inventory.
         def print_items(self, items: list[tuple[str, dict]], surface: Any):
-            items.sort()
             for item in enumerate(items):
                 # For smoother grammar
                 amount: Union[int, str] = item[1][1]["Amount"]
@@ -99,8 +104,7 @@ class Interface:
                 (0, 255, 0)
             )
 
-            items: list[tuple[str, dict]] = [item_ for item_ in actor_.inventory.items()]
-            self.print_items(items, surface)
+            self.print_items(actor_.inventory.get_view(), surface)
 
     class ThrowScreen(SelectScreen):
         def __init__(self, x: int = 0, y: int = 0) -> None:
@@ -162,27 +166,37 @@ class Interface:
             self.floor: int = 1
             self.time: int = 0
 
-        # ~~~ PUBLIC METHODS ~~~
+            # The box is drawn onto its own surface, which is only redrawn when something shown on it changes.
+            self.surface: Any = None
+            self.shown: Optional[tuple] = None
 
-        # Sets reference to player.
-        def set_actor(self, player_: game_entities.actor.Player) -> None:
-            self.player: game_entities.actor.Player = player_
+        def _get_shown(self) -> tuple:
+            """Returns everything the box shows, to tell when it needs to be redrawn."""
 
-        def update(self, time: int, floor: int) -> None:
-            self.time: int = time
-            self.floor: int = floor
+            rounds: Optional[tuple[int, int]] = None
+            if self.player.wielding is not None and self.player.wielding.distance == "RANGED":
+                rounds = (self.player.wielding.rounds_in_mag, self.player.wielding.mag_capacity)
 
-        def render(self, surface: Any) -> None:
+            return (
+                self.player.name, self.player.race, self.player.class_name,
+                self.player.health, self.player.mp, self.player.charge_percent, self.player.ac,
+                self.player.muscle, self.player.smarts, self.player.reflexes, self.player.charm,
+                self.player.grit, self.player.wits,
+                self.player.wielding, rounds, self.player.wearing, self.player.smokes,
+                self.floor, self.time
+            )
+
+        def _draw(self, surface: Any) -> None:
             # Makes little barrier
             for i in range(self.height):
-                rendering.render(surface, chr(9474), self.x, self.y + i, (0, 255, 0))
+                rendering.render(surface, chr(9474), 0, i, (0, 255, 0))
 
             # Shows who you are
             rendering.render(
                 surface,
                 f"{self.player.name}\nThe {self.player.race} {self.player.class_name}",
-                self.x + 2,
-                self.y + 1,
+                2,
+                1,
                 (0, 255, 255)
             )
 
@@ -193,8 +207,8 @@ class Interface:
                     f"HP: {self.player.health}        MP: {self.player.mp}\n"
                     f"Charge: {self.player.charge_percent}%    AC: {self.player.ac}"
                 ),
-                self.x + 2,
-                self.y + 5,
+                2,
+                5,
                 (128, 0, 128)
             )
 
@@ -206,8 +220,8 @@ class Interface:
                     f"Reflexes: {self.player.reflexes}   Charm: {self.player.charm}\n"
                     f"Grit: {self.player.grit}       Wits: {self.player.wits}"
                 ),
-                self.x + 2,
-                self.y + 10,
+                2,
+                10,
                 (255, 192, 203)
             )
 
@@ -222,16 +236,16 @@ class Interface:
                     rendering.render(
                         surface,
                         f"[{self.player.wielding.rounds_in_mag}/{self.player.wielding.mag_capacity}]",
-                        self.x + 17,
-                        self.y + 16,
+                        17,
+                        16,
                         (255, 255, 255)
                     )
 
             rendering.render(
                 surface,
                 f"Wielding: {wielding_}\nWearing: {self.player.wearing}",
-                self.x + 2,
-                self.y + 16,
+                2,
+                16,
                 (255, 255, 255)
             )
 
@@ -239,8 +253,8 @@ class Interface:
             rendering.render(
                 surface,
                 f"Smokes: {self.player.smokes}",
-                self.x + 2,
-                self.y + 18,
+                2,
+                18,
                 (255, 215, 0)
             )
 
@@ -248,11 +262,90 @@ class Interface:
             rendering.render(
                 surface,
                 f"Floor: {self.floor}       Time: {self.time}",
-                self.x + 2,
-                self.y + 22,
+                2,
+                22,
+                (255, 63, 0)
+            )
+
+        # ~~~ PUBLIC METHODS ~~~
+
+        # Sets reference to player.
+        def set_actor(self, player_: game_entities.actor.Player) -> None:
+            self.player: game_entities.actor.Player = player_
+            self.shown = None
+
+        def update(self, time: int, floor: int) -> None:
+            self.time: int = time
+            self.floor: int = floor
+
+        def render(self, surface: Any) -> None:
+            shown: tuple = self._get_shown()
+            if self.surface is None or shown != self.shown:
+                if self.surface is None:
+                    self.surface = rendering.create_surface(self.width, self.height)
+                else:
+                    rendering.clear_surface(self.surface)
+
+                self._draw(self.surface)
+                self.shown = shown
+
+            rendering.blit_surface(self.surface, surface, self.x, self.y)
+
+    class ProfilerBox:
+        """Shows how long each phase of a frame has been taking (not counting the phases nested in it), under the
+        stats."""
+
+        def __init__(self, x: int = 0, y: int = 0) -> None:
+            self.x: int = x
+            self.y: int = y
+
+        def render(self, surface: Any, timer: profiling.PhaseTimer) -> None:
+            rendering.render(surface, "Profiler (ms/frame)", self.x, self.y, (0, 255, 0))
+
+            for (row, name) in enumerate(sorted(timer.history)):
+                rendering.render(
+                    surface,
+                    f"{name:<12}{timer.get_average(name):8.2f}",
+                    self.x,
+                    self.y + 2 + row,
+                    (255, 255, 255)
+                )
+
+            rendering.render(
+                surface,
+                (
+                    f"Turn p50: {timer.get_percentile(50):.2f}\n"
+                    f"Turn p95: {timer.get_percentile(95):.2f}\n"
+                    f"Turn p99: {timer.get_percentile(99):.2f}"
+                ),
+                self.x,
+                self.y + 3 + len(timer.history),
                 (255, 63, 0)
             )
 
+    class Message:
+        """A single message in the log. Identical messages in a row are counted instead of repeated."""
+
+        def __init__(self, text: str, color: Optional[tuple[int, int, int]]) -> None:
+            self.text: str = text
+            self.color: Optional[tuple[int, int, int]] = color
+            self.count: int = 1
+
+            # The message wrapped to the width it was last drawn at, so it's only wrapped once.
+            self.lines: list[str] = []
+            self.wrap_width: int = 0
+
+        def get_lines(self, width: int) -> list[str]:
+            """Returns the message split into lines that fit in a width."""
+
+            if not self.lines or self.wrap_width != width:
+                text: str = self.text if self.count == 1 else f"{self.text} x{self.count}"
+                self.lines = textwrap.wrap(text, width - 2) or ['']
+                self.lines = [f"> {self.lines[0]}"] + [f"  {line}" for line in self.lines[1:]]
+                self.wrap_width = width
+
+            return self.lines
+
     class MessageBox:
         # ~~~ PRIVATE METHODS ~~~
 
@@ -261,21 +354,65 @@ class Interface:
             self.y: int = y
             self.width: int = width
             self.height: int = height
-            self.messages: list[dict] = []
+
+            # Old messages are kept around for scrolling back until there are too many, then the oldest are dropped.
+            self.MAX_MESSAGES: int = 1000
+            self.messages: deque[Interface.Message] = deque(maxlen=self.MAX_MESSAGES)
+
+            # How many messages back from the newest the box is scrolled.
+            self.scroll: int = 0
+
+            # The box is drawn onto its own surface, which is only redrawn when a message comes in or it's scrolled.
+            self.surface: Any = None
+            self.dirty: bool = True
+
+        def _draw(self, surface: Any) -> None:
+            # Makes little barrier
+            for i in range(self.width):
+                rendering.render(surface, chr(9472), i, 0, (0, 255, 0))
+
+            if self.scroll:
+                rendering.render(surface, f"[{self.scroll} more]", 1, 0, (0, 255, 0))
+
+            # Work back from the newest message shown until the box is full, then draw them top down.
+            rows: int = self.height - 1
+            shown: list[tuple[str, Optional[tuple[int, int, int]]]] = []
+            for msg in islice(reversed(self.messages), self.scroll, None):
+                for line in reversed(msg.get_lines(self.width - 1)):
+                    shown.append((line, msg.color))
+                if len(shown) >= rows:
+                    break
+
+            for (row, (line, color)) in enumerate(reversed(shown[:rows])):
+                rendering.render(surface, line, 1, 1 + row, color)
 
         # ~~~ PUBLIC METHODS ~~~
         # Adds a message to the message box.
         def add_msg(self, msg: str, color: Optional[tuple[int, int, int]]) -> None:
-            if len(self.messages) >= (self.height - 1):
-                self.messages.pop(0)
+            self.scroll = 0
+            self.dirty = True
+
+            if self.messages and self.messages[-1].text == msg and self.messages[-1].color == color:
+                self.messages[-1].count += 1
+                self.messages[-1].lines = []
+                return
 
-            self.messages.append(dict({"Text": msg, "Color": color}))
+            self.messages.append(Interface.Message(msg, color))
+
+        # Scrolls back through older messages (or forward with a negative amount).
+        def scroll_by(self, amount: int) -> None:
+            self.scroll = max(0, min(self.scroll + amount, len(self.messages) - 1))
+            self.dirty = True
 
         # Draws the messgae box to the screen.
         def render(self, surface: Any) -> None:
-            # Makes little barrier
-            for i in range(self.width):
-                rendering.render(surface, chr(9472), self.x + i, self.y, (0, 255, 0))
+            if self.surface is None or self.dirty:
+                if self.surface is None:
+                    self.surface = rendering.create_surface(self.width, self.height)
+                else:
+                    rendering.clear_surface(self.surface)
+
+                self._draw(self.surface)
+                self.dirty = False
 
-            for msg in enumerate(self.messages):
-                rendering.render(surface, f"> {msg[1]['Text']}", self.x + 1, self.y + 1 + msg[0], msg[1]['Color'])
+            rendering.blit_surface(self.surface, surface, self.x, self.y)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+from enum import Enum, auto
+from typing import Optional
+import items
+
+
+class Inventory:
+    """Holds the items an actor is carrying, each in a slot with an a-zA-Z id.
+    Slots are also indexed by category (and ammo by caliber) as they are added and removed, so finding what can be
+    wielded or how many rounds of a caliber are left never needs to look through the whole inventory."""
+
+    class Category(Enum):
+        """The kinds of items that get their own index."""
+
+        WIELDABLE = auto(),
+        THROWABLE = auto(),
+        DRUG = auto(),
+        POWER_SOURCE = auto(),
+        AMMO = auto()
+
+    def __init__(self) -> None:
+        # Each slot looks like {"Item": item, "Amount": amount}.
+        self.slots: dict[str, dict] = {}
+
+        self.categories: dict[Inventory.Category, dict[str, dict]] = {category: {} for category in self.Category}
+        self.ammo_slots: dict[str, dict[str, dict]] = {}  # Slots of ammo by caliber.
+        self.ammo_amounts: dict[str, int] = {}  # Total rounds of ammo by caliber.
+
+        # The id of the slot holding each kind of stackable item.
+        self.stacks: dict[tuple[type, str], str] = {}
+
+        # Lists of (id, slot) for the menus sorted by id, built when first asked for and thrown away when the inventory
+        # changes.
+        self.views: dict[Optional[Inventory.Category], list[tuple[str, dict]]] = {}
+
+    def __getitem__(self, item_id: str) -> dict:
+        return self.slots[item_id]
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.slots
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def _get_category(self, item_: items.Item) -> Optional[Category]:
+        """Returns which index an item belongs in, if any."""
+
+        categories: dict = {
+            items.Wieldable: self.Category.WIELDABLE,
+            items.Throwable: self.Category.THROWABLE,
+            items.Drug: self.Category.DRUG,
+            items.PowerSource: self.Category.POWER_SOURCE,
+            items.Ammo: self.Category.AMMO
+        }
+
+        for (item_class, category) in categories.items():
+            if isinstance(item_, item_class):
+                return category
+        return None
+
+    def _get_next_item_id(self) -> str:
+        """Finds the correct a-zA-Z character to assign as an id to a newly acquired items."""
+
+        # Item IDs can be a-zA-Z so loop through all ASCII numbers that match letters.
+        for item_id in range(ord('a'), ord('z') + 1):
+            if not chr(item_id) in self.slots:
+                return chr(item_id)
+        for item_id in range(ord('A'), ord('Z') + 1):
+            if not chr(item_id) in self.slots:
+                return chr(item_id)
+
+    def items(self):
+        """Returns the id and slot of everything in the inventory, like dict.items()."""
+
+        return self.slots.items()
+
+    def add(self, item_: items.Item, amount: int = 1, game_time: int = 0) -> str:
+        """Puts an item into the inventory at a point in time and returns the id of its slot.
+        Stackable items go onto the existing stack of the same item if there is one, so its id doesn't change."""
+
+        category: Optional[Inventory.Category] = self._get_category(item_)
+        if category == self.Category.POWER_SOURCE:
+            # Power sources come fully charged and start to discharge from when they're picked up.
+            item_.charged_at = game_time
+        if category == self.Category.AMMO:
+            self.ammo_amounts[item_.caliber] = self.ammo_amounts.get(item_.caliber, 0) + amount
+
+        item_id: Optional[str] = self.stacks.get(item_.get_stack_key()) if item_.stackable else None
+        if item_id is not None:
+            self.slots[item_id]["Amount"] += amount
+            self.views = {}
+            return item_id
+
+        item_id = self._get_next_item_id()
+        slot: dict = {"Item": item_, "Amount": amount}
+        self.slots[item_id] = slot
+
+        if item_.stackable:
+            self.stacks[item_.get_stack_key()] = item_id
+
+        if category is not None:
+            self.categories[category][item_id] = slot
+
+        if category == self.Category.AMMO:
+            self.ammo_slots.setdefault(item_.caliber, {})[item_id] = slot
+
+        self.views = {}
+        return item_id
+
+    def remove(self, item_id: str, amount: int = 1) -> None:
+        """Decreases the amount of an item and deletes its slot if none are left."""
+
+        slot: dict = self.slots[item_id]
+        slot["Amount"] -= amount
+
+        category: Optional[Inventory.Category] = self._get_category(slot["Item"])
+        if category == self.Category.AMMO:
+            self.ammo_amounts[slot["Item"].caliber] -= amount
+
+        if slot["Amount"] <= 0:
+            del self.slots[item_id]
+            if slot["Item"].stackable:
+                del self.stacks[slot["Item"].get_stack_key()]
+            if category is not None:
+                del self.categories[category][item_id]
+            if category == self.Category.AMMO:
+                del self.ammo_slots[slot["Item"].caliber][item_id]
+
+        self.views = {}
+
+    def remove_ammo(self, caliber: str, amount: int = 1) -> None:
+        """Takes rounds of a caliber out of the inventory, emptying as many slots of it as needed."""
+
+        for item_id in list(self.ammo_slots.get(caliber, {})):
+            if amount <= 0:
+                return
+
+            taken: int = min(amount, self.slots[item_id]["Amount"])
+            self.remove(item_id, taken)
+            amount -= taken
+
+    def get_ammo_amount(self, caliber: str) -> int:
+        """Returns how many rounds of a caliber are in the inventory."""
+
+        return self.ammo_amounts.get(caliber, 0)
+
+    def get_slot(self, item_id: str, category: Optional[Category] = None) -> Optional[dict]:
+        """Returns the slot with an id, or None if there isn't one (or it holds something not in the category)."""
+
+        if category is None:
+            return self.slots.get(item_id)
+
+        return self.categories[category].get(item_id)
+
+    def get_view(self, category: Optional[Category] = None) -> list[tuple[str, dict]]:
+        """Returns a list of the id and slot of everything in a category (or the whole inventory if no category)."""
+
+        view: Optional[list[tuple[str, dict]]] = self.views.get(category)
+        if view is None:
+            slots: dict[str, dict] = self.slots if category is None else self.categories[category]
+            view = sorted(slots.items(), key=lambda slot: slot[0])
+            self.views[category] = view
+
+        return view
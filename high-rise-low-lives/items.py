@@ -12,6 +12,12 @@ class Item:
     def __init__(self, name: str, desc: str) -> None:
         self.name: str = name
         self.desc: str = desc
+        self.stackable: bool = False  # Whether copies of this item share a single inventory slot.
+
+    def get_stack_key(self) -> tuple[type, str]:
+        """Returns what identifies copies of the same item, so they can be stacked together."""
+
+        return type(self), self.name
 
     def on_pick_up(self, src_actor: game_entities.actor.Actor, amount: int = 1):
         """Called when the item is picked up by an actor."""
@@ -71,6 +77,7 @@ class Grenade(Throwable):
         self.damage = damage
         self.blast_radius = blast_radius
         self.fuse = fuse
+        self.stackable = True
 
 
 class Drug(Item):
@@ -84,6 +91,7 @@ class Drug(Item):
 
         super().__init__(name, desc)
         self.effect = effects[effect]
+        self.stackable = True
 
 
 class PowerSource(Item):
@@ -94,6 +102,15 @@ class PowerSource(Item):
 
         self.discharge_time = discharge_time  # Amount of turns before self-discharges and is useless
         self.charge_held = charge_held
+        self.charged_at: int = 0  # The game time it was last full, ie: when it was picked up.
+
+    def get_charge(self, game_time: int) -> int:
+        """Returns how much charge is left at a point in time. Nothing is lost until it discharges all at once."""
+
+        if game_time - self.charged_at >= self.discharge_time:
+            return 0
+
+        return self.charge_held
 
 
 class Cigarette(Item):
@@ -115,3 +132,4 @@ class Ammo(Item):
         super().__init__(name, desc)
         self.caliber = caliber
         self.ammo_type = ammo_type
+        self.stackable = True
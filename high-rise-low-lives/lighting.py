@@ -0,0 +1,140 @@
+from __future__ import annotations
+from typing import Optional
+import numpy
+import fov
+import map
+
+
+# How much light every cell gets with no light source nearby.
+AMBIENT_LIGHT: float = 0.5
+
+# How much light a cell needs for someone standing in it to be spotted.
+DETECTION_LIGHT: float = 0.75
+
+
+class Light:
+    """A source of light on the floor, like a ceiling lamp. It lights the cells it can see within its radius, less the
+    further away they are."""
+
+    def __init__(self, x: int, y: int, radius: int, intensity: float = 1.0) -> None:
+        self.x: int = x
+        self.y: int = y
+        self.radius: int = radius
+        self.intensity: float = intensity
+        self.on: bool = True
+
+
+class LightMap:
+    """Works out how much light falls on each cell of a floor.
+    The light each source adds is worked out once and kept, as an array covering just the cells within its radius, and
+    the light map is the ambient light plus all of those. A light is only worked out again when something within its
+    radius starts or stops blocking the view (ie: a door opens or closes), and taken out when it's switched off."""
+
+    def __init__(self, game_map: map.Map) -> None:
+        self.game_map: map.Map = game_map
+        self.lights: list[Light] = []
+
+        # The light each source adds, with the slices of the floor it covers.
+        self.contributions: dict[Light, tuple[slice, slice, numpy.ndarray]] = {}
+        # Lights to work out again before the light map is next read.
+        self.dirty: set[Light] = set()
+
+        # How much light falls on each cell, indexed [x, y].
+        self.light_map: numpy.ndarray = numpy.zeros((0, 0), dtype=numpy.float32)
+
+        # The transparency layer the lights were last worked out from, to tell which changes actually affect them.
+        self.transparency: numpy.ndarray = numpy.zeros((0, 0), dtype=bool)
+
+        game_map.cell_listeners.append(self.on_cell_changed)
+
+    def _get_bounds(self, light: Light) -> tuple[slice, slice]:
+        """Returns the slices of the floor within a light's radius."""
+
+        return (
+            slice(max(0, light.x - light.radius), min(self.game_map.width, light.x + light.radius + 1)),
+            slice(max(0, light.y - light.radius), min(self.game_map.height, light.y + light.radius + 1))
+        )
+
+    def _compute_contribution(self, light: Light) -> tuple[slice, slice, numpy.ndarray]:
+        """Works out the light a source adds to each cell within its radius."""
+
+        (bounds_x, bounds_y) = self._get_bounds(light)
+        origin_x: int = light.x - bounds_x.start
+        origin_y: int = light.y - bounds_y.start
+
+        lit: numpy.ndarray = fov.compute_fov(self.transparency[bounds_x, bounds_y], origin_x, origin_y, light.radius)
+        (xs, ys) = numpy.ogrid[0:lit.shape[0], 0:lit.shape[1]]
+        falloff: numpy.ndarray = numpy.clip(1 - numpy.hypot(xs - origin_x, ys - origin_y) / (light.radius + 1), 0, 1)
+
+        return bounds_x, bounds_y, numpy.where(lit, light.intensity * falloff, 0).astype(numpy.float32)
+
+    def _update(self) -> None:
+        """Works out any lights that have changed, swapping their old contribution for the new one."""
+
+        for light in self.dirty:
+            old: Optional[tuple[slice, slice, numpy.ndarray]] = self.contributions.pop(light, None)
+            if old is not None:
+                self.light_map[old[0], old[1]] -= old[2]
+
+            if light.on:
+                new: tuple[slice, slice, numpy.ndarray] = self._compute_contribution(light)
+                self.light_map[new[0], new[1]] += new[2]
+                self.contributions[light] = new
+
+        self.dirty = set()
+
+    def build(self) -> None:
+        """Works out every light from scratch, ie: when the floor is built."""
+
+        self.transparency = self.game_map.transparency.copy()
+        self.light_map = numpy.full((self.game_map.width, self.game_map.height), AMBIENT_LIGHT, dtype=numpy.float32)
+        self.contributions = {}
+        self.dirty = set(self.lights)
+
+    def add(self, light: Light) -> None:
+        """Puts a light on the floor."""
+
+        self.lights.append(light)
+        self.dirty.add(light)
+
+    def switch(self, light: Light, on: bool) -> None:
+        """Switches a light on or off, ie: when it's sabotaged."""
+
+        if light.on != on:
+            light.on = on
+            self.dirty.add(light)
+
+    def on_cell_changed(self, x: int, y: int) -> None:
+        """Called by the map when something changes at a cell. If it started or stopped blocking the view, every light
+        with it in its radius has to be worked out again."""
+
+        if not self.transparency.size or self.transparency[x, y] == self.game_map.transparency[x, y]:
+            return
+
+        self.transparency[x, y] = self.game_map.transparency[x, y]
+        for light in self.lights:
+            if abs(light.x - x) <= light.radius and abs(light.y - y) <= light.radius:
+                self.dirty.add(light)
+
+    def get_light_map(self) -> numpy.ndarray:
+        """Returns how much light falls on each cell, indexed [x, y]. Cells can get more than 1 from several lights."""
+
+        if self.light_map.shape != (self.game_map.width, self.game_map.height):
+            self.build()
+        if self.dirty:
+            self._update()
+
+        return self.light_map
+
+    def get_light(self, x: int, y: int) -> float:
+        """Returns how much light falls on a cell, from 0 to 1."""
+
+        if not self.game_map.in_bounds(x, y):
+            return 0
+
+        return min(1.0, float(self.get_light_map()[x, y]))
+
+    def is_lit(self, x: int, y: int) -> bool:
+        """Returns whether a cell is bright enough for someone standing in it to be spotted."""
+
+        return self.get_light(x, y) >= DETECTION_LIGHT
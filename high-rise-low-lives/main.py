@@ -1,6 +1,9 @@
+from typing import Any
+import argparse
 import tcod
 import interface
 import map
+import lighting
 import databases
 import game_engine
 import ai
@@ -257,6 +260,13 @@ def spawn_traps(
 ) -> None:
     game_entities.trap.Trap(60, 18, game_data_, entities__, game_interface_)
     game_entities.trap.Trap(33, 14, game_data_, entities__, game_interface_)
+
+
+def spawn_lights(game_map_: map.Map) -> None:
+    game_map_.lighting.add(lighting.Light(30, 15, 7))
+    game_map_.lighting.add(lighting.Light(59, 18, 4))
+    game_map_.lighting.add(lighting.Light(46, 7, 6))
+    game_map_.lighting.add(lighting.Light(20, 38, 9))
 # END TEMPORARY STUFF
 
 
@@ -331,46 +341,72 @@ def init_interface(game_db: databases.Databases) -> interface.Interface:
     return game_interface_
 
 
-# Define screen and map size.
+# Define screen and map size. Floors bigger than the map area scroll to follow the player.
 SCREEN_WIDTH: int = 100
 SCREEN_HEIGHT: int = 50
 MAP_WIDTH: int = 70
 MAP_HEIGHT: int = 42
 
 
-# Initialize game objects and assign.
-GAME_DATA: databases.Databases = databases.Databases()
-GAME_DATA.load_from_files()
-window: tcod.context.Context
-root_console: tcod.Console
-(window, root_console) = init_tcod()
-entities_: game_entities.entities.GameEntities = game_entities.entities.GameEntities(window, root_console)
-game_interface: interface.Interface = init_interface(GAME_DATA)
-
-# Generate map (for now read from file, will be randomly generated)
-# Initialize first so that it is drawn on bottom
-game_map: map.Map = map.Map(GAME_DATA, entities_, game_interface)
-game_map.read_map("Maps/game_map.txt")
-
-# THESE ARE TEMPORARY, JUST HERE FOR SOMETHING TO TEST
-spawn_items(GAME_DATA, entities_, game_interface)
-spawn_enemies(GAME_DATA, entities_, game_interface)
-spawn_terminals(GAME_DATA, entities_, game_interface)
-spawn_cameras(GAME_DATA, entities_, game_interface)
-spawn_traps(GAME_DATA, entities_, game_interface)
-entities_.doors[1].locked = True  # Just lock an arbitrary door as a test.
-# END TEMPORARY STUFF
-
-# Init player last so they are rendered last.
-player: game_entities.actor.Player = init_player(GAME_DATA, entities_, game_interface)
-game_interface.stats_box.set_actor(player)
-
-# Initialize game engine.
-engine: game_engine.GameEngine = game_engine.GameEngine(entities_, game_interface,
-                                                        GAME_DATA, player, (MAP_WIDTH, MAP_HEIGHT))
-
-# The game loop!
-while True:
-    engine.handle_rendering(window, root_console)
-    engine.handle_input()
-    engine.handle_updates()
+def new_game(game_data_: databases.Databases, window_: Any, root_console_: Any) -> game_engine.GameEngine:
+    """Builds the floor and everything on it and returns an engine ready to play it.
+    The window and console can be None to play without drawing anything, ie: in simulations."""
+
+    entities__: game_entities.entities.GameEntities = game_entities.entities.GameEntities(window_, root_console_)
+    game_interface_: interface.Interface = init_interface(game_data_)
+
+    # Generate map (for now read from file, will be randomly generated)
+    # Initialize first so that it is drawn on bottom
+    game_map_: map.Map = map.Map(game_data_, entities__, game_interface_)
+    game_map_.read_map("maps/game_map.txt")
+
+    # THESE ARE TEMPORARY, JUST HERE FOR SOMETHING TO TEST
+    spawn_items(game_data_, entities__, game_interface_)
+    spawn_enemies(game_data_, entities__, game_interface_)
+    spawn_terminals(game_data_, entities__, game_interface_)
+    spawn_cameras(game_data_, entities__, game_interface_)
+    spawn_traps(game_data_, entities__, game_interface_)
+    spawn_lights(game_map_)
+    entities__.doors[1].lock()  # Just lock an arbitrary door as a test.
+    # END TEMPORARY STUFF
+
+    # Now that the floor is populated, work out where actors can walk.
+    game_map_.build_layers()
+
+    # Init player last so they are rendered last.
+    player_: game_entities.actor.Player = init_player(game_data_, entities__, game_interface_)
+    game_interface_.stats_box.set_actor(player_)
+
+    # Initialize game engine.
+    return game_engine.GameEngine(entities__, game_interface_, game_data_, player_, (MAP_WIDTH, MAP_HEIGHT))
+
+
+if __name__ == "__main__":
+    # Read command line options.
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="High-Rise Low-Lives")
+    parser.add_argument(
+        "--profile-turns",
+        type=int,
+        default=0,
+        metavar="N",
+        help="profile the first N turns and save the results to profile.*"
+    )
+    args: argparse.Namespace = parser.parse_args()
+
+    # Initialize game objects and assign.
+    GAME_DATA: databases.Databases = databases.Databases()
+    GAME_DATA.load_from_files()
+    window: tcod.context.Context
+    root_console: tcod.Console
+    (window, root_console) = init_tcod()
+    engine: game_engine.GameEngine = new_game(GAME_DATA, window, root_console)
+    engine.entities.turn_profiler.start(args.profile_turns)
+
+    # The game loop!
+    while True:
+        engine.handle_rendering(window, root_console)
+        if engine.is_busy():
+            engine.handle_interrupts()
+        else:
+            engine.handle_input()
+        engine.handle_updates()
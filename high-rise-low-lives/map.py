@@ -1,16 +1,40 @@
+from __future__ import annotations
+from typing import Callable
+import numpy
 import databases
 import interface
+import pathfinding
+import noise
+import visibility
+import exploration
+import fog
+import lighting
+import zones
+import vents
 import game_entities.entities
 import game_entities.entity
 import game_entities.tile
 import game_entities.vent
 import game_entities.door
+import game_entities.actor
+import game_entities.item_entity
+import game_entities.explosive
+import game_entities.terminal
+
+
+# Movement costs used by the walkable layer. A cost of 0 means the cell can't be walked on.
+FLOOR_COST: int = 1
+DOOR_COST: int = 2  # Doors take a turn to open before they can be walked through.
+LOCKED_DOOR_COST: int = 0
+
+# Visibility matrices bigger than this many bytes get reported when the floor is built.
+LARGE_VISIBILITY_MATRIX: int = 64 * 1024 * 1024
 
 
 class Map:
     """Represents a game map.
-    Right now this is pretty useless other than the read_map method, because a map is just a collection of entities
-    and the game_entities list holds all of those."""
+    A map is just a collection of entities and the game_entities list holds all of those, so the map mostly keeps
+    layers derived from them (like where actors can walk) that would be too slow to work out entity by entity."""
 
     def __init__(
             self,
@@ -23,6 +47,46 @@ class Map:
         self.game_entities: game_entities.entities.GameEntities = game_entities_
         self.game_interface: interface.Interface = game_interface
 
+        self.width: int = 0
+        self.height: int = 0
+        self.floor: int = 1  # Which floor of the tower this is.
+
+        # How much it costs to walk onto each cell, indexed [x][y]. Built once the floor is populated.
+        self.move_costs: list[list[int]] = []
+
+        # Whether each cell can be seen through, indexed [x, y].
+        self.transparency: numpy.ndarray = numpy.zeros((0, 0), dtype=bool)
+
+        # Functions called with the x/y of a cell whenever the walkable layer changes there.
+        self.cell_listeners: list[Callable[[int, int], None]] = []
+
+        # The rooms, corridors and vents of the floor and the doors between them.
+        self.zones: zones.ZoneMap = zones.ZoneMap(self)
+
+        # The vents, a plane of their own the player can crawl through.
+        self.vent_network: vents.VentNetwork = vents.VentNetwork(self)
+
+        # The distance to the player shared by every actor chasing them.
+        self.chase_field: pathfinding.FlowField = pathfinding.FlowField(self)
+
+        # Finds and caches paths to anywhere else, ie: patrol points, alarms and terminals.
+        self.pathfinder: pathfinding.Pathfinder = pathfinding.HierarchicalPathfinder(self)
+
+        # How loud it is on each cell this tick.
+        self.noise_field: noise.NoiseField = noise.NoiseField(self)
+
+        # Which cells can be seen from which.
+        self.visibility: visibility.VisibilityMatrix = visibility.VisibilityMatrix(self)
+
+        # How much light falls on each cell.
+        self.lighting: lighting.LightMap = lighting.LightMap(self)
+
+        # What the player can see now and has seen before, and the way to whatever they haven't.
+        self.fog: fog.FogOfWar = fog.FogOfWar(self)
+        self.explorer: exploration.Explorer = exploration.Explorer(self)
+
+        game_entities_.game_map = self
+
     def _char_to_entity(self, char: str, x: int, y: int) -> game_entities.entity.Entity:
         """Converts a character from a map file into a game entity."""
 
@@ -69,6 +133,9 @@ class Map:
         map_file = open(file)
         map_lines = map_file.readlines()
 
+        self.height = len(map_lines)
+        self.width = max(len(line.rstrip('\n')) for line in map_lines)
+
         for y in enumerate(map_lines):
             # self.map.append([])
             for x in enumerate(y[1]):
@@ -76,3 +143,95 @@ class Map:
                     # new_entity =
                     self._char_to_entity(x[1], x[0], y[0])
                     # self.map[y[0]].append(new_entity)
+
+    def _compute_cell_cost(self, cell_entities: list[game_entities.entity.Entity]) -> int:
+        """Works out the movement cost of a cell from the entities on it."""
+
+        cost: int = FLOOR_COST if cell_entities else 0
+        for entity_ in cell_entities:
+            # Things that move around or come and go don't belong on the walkable layer.
+            if isinstance(entity_, (
+                    game_entities.actor.Actor,
+                    game_entities.item_entity.ItemEntity,
+                    game_entities.explosive.Explosive
+            )):
+                continue
+
+            if isinstance(entity_, game_entities.door.Door):
+                if entity_.locked:
+                    return LOCKED_DOOR_COST
+                elif not entity_.opened:
+                    cost = max(cost, DOOR_COST)
+            # NPCs don't follow the player into the vents, and bumping into a terminal hacks it.
+            elif isinstance(entity_, (game_entities.vent.Vent, game_entities.terminal.Terminal)) or entity_.blocked:
+                return 0
+
+        return cost
+
+    def _compute_cell_transparency(self, cell_entities: list[game_entities.entity.Entity]) -> bool:
+        """Works out whether a cell can be seen through from the entities on it. Like a line of sight, only something
+        giving 100% cover blocks the view."""
+
+        for entity_ in cell_entities:
+            if isinstance(entity_, (
+                    game_entities.actor.Actor,
+                    game_entities.item_entity.ItemEntity,
+                    game_entities.explosive.Explosive
+            )):
+                continue
+
+            if entity_.cover_percent == 100:
+                return False
+
+        return bool(cell_entities)
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        """Returns whether a point lies on the map."""
+
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def build_layers(self) -> None:
+        """Builds the walkable layer from everything on the floor. Called once the floor has been populated."""
+
+        # Group the entities by cell in a single pass instead of searching every entity for every cell.
+        cells: dict[tuple[int, int], list[game_entities.entity.Entity]] = {}
+        for entity_ in self.game_entities.all:
+            cells.setdefault((entity_.x, entity_.y), []).append(entity_)
+
+        self.move_costs = [
+            [self._compute_cell_cost(cells.get((x, y), [])) for y in range(self.height)] for x in range(self.width)
+        ]
+        self.transparency = numpy.array(
+            [[self._compute_cell_transparency(cells.get((x, y), [])) for y in range(self.height)]
+             for x in range(self.width)],
+            dtype=bool
+        ).reshape((self.width, self.height))
+
+        self.zones.build()
+        self.vent_network.build()
+        self.chase_field.dirty = True
+        self.pathfinder.clear()
+        self.noise_field.reset()
+        self.visibility.build()
+        self.fog.reset()
+        self.lighting.build()
+        self.explorer.reset()
+
+        if self.visibility.get_memory_usage() > LARGE_VISIBILITY_MATRIX:
+            self.game_interface.message_box.add_msg(
+                f"Visibility matrix uses {self.visibility.get_memory_usage() / (1024 * 1024):.1f} MiB on this floor.",
+                self.game_data.colors["SYS_MSG"]
+            )
+
+    def update_cell(self, x: int, y: int) -> None:
+        """Recalculates the walkable layer at a single cell after something there changed, ie: a door opened."""
+
+        if not self.move_costs or not self.in_bounds(x, y):
+            return
+
+        cell_entities: list[game_entities.entity.Entity] = self.game_entities.get_all_at(x, y)
+        self.move_costs[x][y] = self._compute_cell_cost(cell_entities)
+        self.transparency[x, y] = self._compute_cell_transparency(cell_entities)
+
+        for listener in self.cell_listeners:
+            listener(x, y)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+from typing import Any, Optional
+import heapq
+import map
+import pathfinding
+
+
+# How much quieter a noise gets after passing through a closed door, on top of the distance it travelled.
+DOOR_DAMPING: int = 5
+
+
+class Emission:
+    """The noise made by a single entity, and how loud it is at every cell it reached."""
+
+    def __init__(self, x: int, y: int, volume: int) -> None:
+        self.x: int = x
+        self.y: int = y
+        self.volume: int = volume
+        self.cells: dict[tuple[int, int], int] = {}
+        # The closed doors it reached, even those it was too quiet to get through.
+        self.doors: set[tuple[int, int]] = set()
+
+
+class NoiseField:
+    """Spreads noises outward over the floor and keeps how loud it is at every cell for the current tick,
+    so anyone can check what they hear in O(1).
+    Each emitter's flood is kept, so something that keeps making the same noise (like a triggered camera) only floods
+    the map again if it moves, changes volume or a door along the way changes."""
+
+    def __init__(self, game_map: map.Map) -> None:
+        self.game_map: map.Map = game_map
+
+        # How loud it is at each cell, indexed [x][y]. This is the loudest of all the noises reaching a cell.
+        self.intensity: list[list[int]] = []
+
+        self.emissions: dict[Any, Emission] = {}
+        self.emitted: set[Any] = set()  # The emitters that made noise since the last tick ended.
+
+        # Which emitters reached each cell and how loud they were there.
+        self.sources: dict[tuple[int, int], dict[Any, int]] = {}
+        # Which emitters reached each closed door, so opening one spreads them again even if none got through.
+        self.blocked_at: dict[tuple[int, int], set[Any]] = {}
+
+        game_map.cell_listeners.append(self.on_cell_changed)
+
+    def _flood(self, emission: Emission) -> None:
+        """Spreads a noise outward from its emitter. It gets quieter with distance and with each closed door it passes
+        through, and can't pass through walls at all."""
+
+        costs: list[list[int]] = self.game_map.move_costs
+        doors: set[tuple[int, int]] = {
+            (door_.x, door_.y) for door_ in self.game_map.game_entities.doors if not door_.opened
+        }
+
+        emission.cells = {(emission.x, emission.y): emission.volume}
+        emission.doors = set()
+        frontier: list[tuple[int, int, int]] = [(-emission.volume, emission.x, emission.y)]
+
+        while frontier:
+            (loudness, x, y) = heapq.heappop(frontier)
+            loudness = -loudness
+            if loudness < emission.cells[(x, y)]:
+                continue
+
+            for (dx, dy) in pathfinding.DIRECTIONS:
+                cell: tuple[int, int] = (x + dx, y + dy)
+                if not self.game_map.in_bounds(cell[0], cell[1]):
+                    continue
+
+                next_loudness: int = loudness - 1
+                if cell in doors:
+                    next_loudness -= DOOR_DAMPING
+                    emission.doors.add(cell)
+                elif not costs[cell[0]][cell[1]]:
+                    continue
+
+                if next_loudness > 0 and next_loudness > emission.cells.get(cell, 0):
+                    emission.cells[cell] = next_loudness
+                    heapq.heappush(frontier, (-next_loudness, cell[0], cell[1]))
+
+    def _add(self, emitter: Any, emission: Emission) -> None:
+        """Writes an emission into the intensity grid."""
+
+        self.emissions[emitter] = emission
+        for (cell, loudness) in emission.cells.items():
+            self.sources.setdefault(cell, {})[emitter] = loudness
+            if loudness > self.intensity[cell[0]][cell[1]]:
+                self.intensity[cell[0]][cell[1]] = loudness
+        for cell in emission.doors:
+            self.blocked_at.setdefault(cell, set()).add(emitter)
+
+    def _remove(self, emitter: Any) -> None:
+        """Takes an emission back out of the intensity grid, leaving whatever other noises reach the same cells."""
+
+        emission: Emission = self.emissions.pop(emitter)
+        for cell in emission.cells:
+            cell_sources: dict[Any, int] = self.sources[cell]
+            del cell_sources[emitter]
+            self.intensity[cell[0]][cell[1]] = max(cell_sources.values(), default=0)
+            if not cell_sources:
+                del self.sources[cell]
+        for cell in emission.doors:
+            self.blocked_at[cell].discard(emitter)
+            if not self.blocked_at[cell]:
+                del self.blocked_at[cell]
+
+    def reset(self) -> None:
+        """Clears all noise, ie: when a new floor is built."""
+
+        self.intensity = [[0] * self.game_map.height for _ in range(self.game_map.width)]
+        self.emissions = {}
+        self.emitted = set()
+        self.sources = {}
+        self.blocked_at = {}
+
+    def emit(self, emitter: Any, x: int, y: int, volume: int) -> None:
+        """Makes a noise at a point. Making the same noise from the same place again just keeps it going."""
+
+        if not self.intensity:
+            self.reset()
+
+        self.emitted.add(emitter)
+
+        emission: Optional[Emission] = self.emissions.get(emitter)
+        if emission is not None:
+            if (emission.x, emission.y, emission.volume) == (x, y, volume):
+                return
+            self._remove(emitter)
+
+        emission = Emission(x, y, volume)
+        self._flood(emission)
+        self._add(emitter, emission)
+
+    def end_tick(self) -> None:
+        """Called after every tick to silence anything that didn't make its noise again."""
+
+        for emitter in [emitter for emitter in self.emissions if emitter not in self.emitted]:
+            self._remove(emitter)
+
+        self.emitted = set()
+
+    def on_cell_changed(self, x: int, y: int) -> None:
+        """Called by the map when the walkable layer changes, ie: a door is opened.
+        Only the noises that reached the cell (or the door there, if they were too quiet to get through it) need to be
+        spread again."""
+
+        for emitter in list(dict.fromkeys([*self.sources.get((x, y), {}), *self.blocked_at.get((x, y), ())])):
+            emission: Emission = self.emissions[emitter]
+            self._remove(emitter)
+            self._flood(emission)
+            self._add(emitter, emission)
+
+    def get_intensity(self, x: int, y: int) -> int:
+        """Returns how loud it is at a cell this tick."""
+
+        if not self.intensity or not self.game_map.in_bounds(x, y):
+            return 0
+
+        return self.intensity[x][y]
+
+    def get_sources(self, x: int, y: int) -> dict[Any, int]:
+        """Returns everything that can be heard at a cell this tick, with how loud each one is where it's made."""
+
+        return {emitter: self.emissions[emitter].volume for emitter in self.sources.get((x, y), {})}
@@ -0,0 +1,488 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Optional
+import heapq
+import math
+import map
+import zones
+
+
+# The four directions actors are able to step in.
+DIRECTIONS: tuple[tuple[int, int], ...] = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+# The most failed searches to remember before forgetting them all.
+MAX_NO_PATHS: int = 1024
+
+# The most goals to keep routes over the doors for, forgetting the least recently used first.
+MAX_ROUTES: int = 256
+
+
+class DijkstraMap:
+    """Holds the walking distance from every cell on the map to the nearest of a set of goal cells.
+    Walking downhill on a Dijkstra map from any cell leads to the closest goal."""
+
+    def __init__(self, game_map: map.Map) -> None:
+        self.game_map: map.Map = game_map
+        self.goals: set[tuple[int, int]] = set()
+        self.distances: list[list[float]] = []
+
+    def compute(self, goals: set[tuple[int, int]]) -> None:
+        """Floods outward from the goals over the walkable layer, storing the cost to reach a goal from each cell."""
+
+        costs: list[list[int]] = self.game_map.move_costs
+        width: int = self.game_map.width
+        height: int = self.game_map.height
+
+        self.goals = set(goals)
+        self.distances = [[math.inf] * height for _ in range(width)]
+        distances: list[list[float]] = self.distances
+
+        frontier: list[tuple[float, int, int]] = []
+        for (x, y) in self.goals:
+            if self.game_map.in_bounds(x, y):
+                distances[x][y] = 0
+                frontier.append((0, x, y))
+        heapq.heapify(frontier)
+
+        while frontier:
+            (distance, x, y) = heapq.heappop(frontier)
+            if distance > distances[x][y]:
+                continue
+
+            # Stepping from a neighbour onto this cell costs whatever this cell costs to enter.
+            # Goals are always enterable since it's usually something (like the player) standing on them.
+            step_cost: int = costs[x][y] if (x, y) not in self.goals else 1
+            if not step_cost:
+                continue
+
+            for (dx, dy) in DIRECTIONS:
+                nx: int = x + dx
+                ny: int = y + dy
+                if 0 <= nx < width and 0 <= ny < height and costs[nx][ny] and distance + step_cost < distances[nx][ny]:
+                    distances[nx][ny] = distance + step_cost
+                    heapq.heappush(frontier, (distance + step_cost, nx, ny))
+
+    def get_distance(self, x: int, y: int) -> float:
+        """Returns the cost of walking from a cell to the nearest goal."""
+
+        if not self.distances or not self.game_map.in_bounds(x, y):
+            return math.inf
+
+        return self.distances[x][y]
+
+    def get_steps(self, x: int, y: int) -> list[tuple[int, int]]:
+        """Returns the directions that lead downhill from a cell, best first."""
+
+        here: float = self.get_distance(x, y)
+        steps: list[tuple[float, tuple[int, int]]] = []
+        for direction in DIRECTIONS:
+            distance: float = self.get_distance(x + direction[0], y + direction[1])
+            if distance < here:
+                steps.append((distance, direction))
+
+        steps.sort()
+        return [step[1] for step in steps]
+
+    def get_step(self, x: int, y: int) -> Optional[tuple[int, int]]:
+        """Returns the direction of the lowest neighbour of a cell, or None if already at a goal or stuck."""
+
+        steps: list[tuple[int, int]] = self.get_steps(x, y)
+        return steps[0] if steps else None
+
+
+class FlowField(DijkstraMap):
+    """A Dijkstra map toward a single moving target (ie: the player) that is shared by every actor chasing it.
+    The field is only recomputed the first time it is asked for after the target moves or the map changes,
+    so any number of chasers cost about as much as one."""
+
+    def __init__(self, game_map: map.Map) -> None:
+        super().__init__(game_map)
+
+        self.target: Optional[tuple[int, int]] = None
+        self.dirty: bool = True
+
+        game_map.cell_listeners.append(self.on_cell_changed)
+
+    def on_cell_changed(self, x: int, y: int) -> None:
+        """Called by the map when the walkable layer changes, ie: a door is opened."""
+
+        self.dirty = True
+
+    def aim_at(self, x: int, y: int) -> None:
+        """Points the field toward a target, recomputing it only if the target moved or the map changed."""
+
+        if self.dirty or self.target != (x, y):
+            self.target = (x, y)
+            self.dirty = False
+            self.compute({(x, y)})
+
+
+class Pathfinder:
+    """Finds paths between any two cells with A* over the walkable layer.
+    Found paths are cached, and since every part of a shortest path is itself a shortest path, each cell along a path
+    can reuse it on the way to the same goal. A path is only thrown away when a cell on it changes."""
+
+    def __init__(self, game_map: map.Map) -> None:
+        self.game_map: map.Map = game_map
+
+        # Maps (start, goal) to a path and the position of start within it.
+        self.paths: dict[tuple[tuple[int, int], tuple[int, int]], tuple[list[tuple[int, int]], int]] = {}
+        # Maps each cell to the cached paths that pass through it, keyed by id so paths can be removed quickly.
+        self.paths_through: dict[tuple[int, int], dict[int, list[tuple[int, int]]]] = {}
+        # Searches that found nothing. Any change to the map might open a way, so these are all forgotten together, as
+        # they are when there get to be too many.
+        self.no_paths: set[tuple[tuple[int, int], tuple[int, int]]] = set()
+
+        game_map.cell_listeners.append(self.on_cell_changed)
+
+    def _search(self, start: tuple[int, int], goal: tuple[int, int]) -> list[tuple[int, int]]:
+        """Runs A* from start to goal. Returns the path including both ends, or an empty list if there isn't one."""
+
+        costs: list[list[int]] = self.game_map.move_costs
+        came_from: dict[tuple[int, int], Optional[tuple[int, int]]] = {start: None}
+        cost_so_far: dict[tuple[int, int], int] = {start: 0}
+
+        # Entries are (estimated total cost, cost so far, cell). Manhattan distance never overestimates on a grid
+        # with four directions and a minimum step cost of 1.
+        frontier: list[tuple[int, int, tuple[int, int]]] = [
+            (abs(goal[0] - start[0]) + abs(goal[1] - start[1]), 0, start)
+        ]
+
+        while frontier:
+            (_, cost, cell) = heapq.heappop(frontier)
+            if cell == goal:
+                break
+            if cost > cost_so_far[cell]:
+                continue
+
+            for (dx, dy) in DIRECTIONS:
+                next_cell: tuple[int, int] = (cell[0] + dx, cell[1] + dy)
+                if not self.game_map.in_bounds(next_cell[0], next_cell[1]):
+                    continue
+
+                # The goal can always be stepped onto, since it's usually something like a terminal or an actor.
+                step_cost: int = costs[next_cell[0]][next_cell[1]] if next_cell != goal else 1
+                if not step_cost:
+                    continue
+
+                new_cost: int = cost + step_cost
+                if next_cell not in cost_so_far or new_cost < cost_so_far[next_cell]:
+                    cost_so_far[next_cell] = new_cost
+                    came_from[next_cell] = cell
+                    estimate: int = new_cost + abs(goal[0] - next_cell[0]) + abs(goal[1] - next_cell[1])
+                    heapq.heappush(frontier, (estimate, new_cost, next_cell))
+
+        if goal not in came_from:
+            return []
+
+        path: list[tuple[int, int]] = []
+        step: Optional[tuple[int, int]] = goal
+        while step is not None:
+            path.append(step)
+            step = came_from[step]
+        path.reverse()
+
+        return path
+
+    def _remember(self, path: list[tuple[int, int]]) -> None:
+        """Caches a path for every cell along it."""
+
+        goal: tuple[int, int] = path[-1]
+        for index, cell in enumerate(path):
+            self.paths[(cell, goal)] = (path, index)
+            self.paths_through.setdefault(cell, {})[id(path)] = path
+
+    def _forget(self, path: list[tuple[int, int]]) -> None:
+        """Removes a path from the cache for every cell along it."""
+
+        goal: tuple[int, int] = path[-1]
+        for cell in path:
+            cached: Optional[tuple[list[tuple[int, int]], int]] = self.paths.get((cell, goal))
+            if cached is not None and cached[0] is path:
+                del self.paths[(cell, goal)]
+
+            paths_here: Optional[dict[int, list[tuple[int, int]]]] = self.paths_through.get(cell)
+            if paths_here is not None:
+                paths_here.pop(id(path), None)
+                if not paths_here:
+                    del self.paths_through[cell]
+
+    def on_cell_changed(self, x: int, y: int) -> None:
+        """Called by the map when the walkable layer changes, ie: a door is opened."""
+
+        for path in list(self.paths_through.get((x, y), {}).values()):
+            self._forget(path)
+
+        self.no_paths.clear()
+
+    def clear(self) -> None:
+        """Forgets every cached path, ie: when the whole floor changes."""
+
+        self.paths = {}
+        self.paths_through = {}
+        self.no_paths = set()
+
+    def get_path(self, start: tuple[int, int], goal: tuple[int, int]) -> list[tuple[int, int]]:
+        """Returns the cells to walk through to get from start to goal, not including start.
+        Returns an empty list if the goal can't be reached."""
+
+        if start == goal or (start, goal) in self.no_paths:
+            return []
+
+        cached: Optional[tuple[list[tuple[int, int]], int]] = self.paths.get((start, goal))
+        if cached is None:
+            path: list[tuple[int, int]] = self._search(start, goal)
+            if not path:
+                if len(self.no_paths) >= MAX_NO_PATHS:
+                    self.no_paths.clear()
+                self.no_paths.add((start, goal))
+                return []
+
+            self._remember(path)
+            cached = (path, 0)
+
+        return cached[0][cached[1] + 1:]
+
+    def get_step(self, start: tuple[int, int], goal: tuple[int, int]) -> Optional[tuple[int, int]]:
+        """Returns the direction of the next step from start toward goal, or None if there's no way there."""
+
+        if start == goal:
+            return None
+
+        cached: Optional[tuple[list[tuple[int, int]], int]] = self.paths.get((start, goal))
+        if cached is not None:
+            next_cell: tuple[int, int] = cached[0][cached[1] + 1]
+        else:
+            path: list[tuple[int, int]] = self.get_path(start, goal)
+            if not path:
+                return None
+            next_cell = path[0]
+
+        return next_cell[0] - start[0], next_cell[1] - start[1]
+
+
+class HierarchicalPathfinder(Pathfinder):
+    """Finds paths over the rooms and doors of the floor first, and only down to the cells within the room the actor is
+    in. Each room keeps the distance from each of its doors to every cell in it (and so to its other doors), and each
+    goal keeps the distance to it from every door, so a step toward a goal in another room is a handful of lookups.
+    Once the actor is in the same room as the goal, the cell-level A* of the Pathfinder takes over.
+    A door's distances don't depend on whether it's open, so opening and closing doors leaves them alone. A door
+    locking or unlocking only throws away the routes that went (or could now go) through it, which are quick to work
+    out again from the rooms."""
+
+    def __init__(self, game_map: map.Map) -> None:
+        super().__init__(game_map)
+
+        # The distance from every cell of a zone to each of its doors, by zone then door.
+        self.door_maps: dict[int, dict[tuple[int, int], dict[tuple[int, int], float]]] = {}
+        # The distance from every door to a goal, by goal, least recently used first.
+        self.routes: OrderedDict[tuple[int, int], dict[tuple[int, int], float]] = OrderedDict()
+        # The doors that were locked when the routes were worked out, to tell a door locking from it just opening.
+        self.locked: set[tuple[int, int]] = set()
+
+    def _flood_zone(self, zone_id: int, door: tuple[int, int]) -> dict[tuple[int, int], float]:
+        """Works out the distance to a door from every cell of a zone, and from the zone's other doors."""
+
+        costs: list[list[int]] = self.game_map.move_costs
+        zone_map: zones.ZoneMap = self.game_map.zones
+        distances: dict[tuple[int, int], float] = {door: 0}
+        frontier: list[tuple[float, tuple[int, int]]] = [(0, door)]
+
+        while frontier:
+            (distance, cell) = heapq.heappop(frontier)
+            if distance > distances[cell]:
+                continue
+            # Other doors are where the zone ends, so they're reached but not walked through.
+            if cell != door and cell in zone_map.connections:
+                continue
+
+            # Like a Dijkstra map, stepping onto a cell costs what the cell costs, and the door itself is the goal.
+            step_cost: int = costs[cell[0]][cell[1]] if cell != door else 1
+            for (dx, dy) in DIRECTIONS:
+                next_cell: tuple[int, int] = (cell[0] + dx, cell[1] + dy)
+                connection: Optional[zones.Connection] = zone_map.get_connection(next_cell[0], next_cell[1])
+                in_zone: bool = zone_map.get_zone(next_cell[0], next_cell[1]) == zone_id or \
+                    (connection is not None and zone_id in connection.zones)
+                if in_zone and distance + step_cost < distances.get(next_cell, math.inf):
+                    distances[next_cell] = distance + step_cost
+                    heapq.heappush(frontier, (distance + step_cost, next_cell))
+
+        return distances
+
+    def _get_doors(self, zone_id: int) -> list[tuple[int, int]]:
+        """Returns the doors of a zone that can be walked through."""
+
+        return [
+            (connection.x, connection.y) for connection in self.game_map.zones.zones[zone_id].connections
+            if connection.open and not connection.is_vent()
+        ]
+
+    def _get_door_map(self, zone_id: int, door: tuple[int, int]) -> dict[tuple[int, int], float]:
+        """Returns the distance to a door from every cell of a zone, working it out the first time it's needed."""
+
+        door_maps: dict[tuple[int, int], dict[tuple[int, int], float]] = self.door_maps.setdefault(zone_id, {})
+        if door not in door_maps:
+            door_maps[door] = self._flood_zone(zone_id, door)
+
+        return door_maps[door]
+
+    def _get_walkable_zones(self, x: int, y: int) -> tuple[int, ...]:
+        """Returns the zones of a cell that can be walked in, ie: not the vents."""
+
+        zone_map: zones.ZoneMap = self.game_map.zones
+        return tuple(
+            zone_id for zone_id in zone_map.get_cell_zones(x, y)
+            if zone_map.zones[zone_id].kind != zones.Zone.Kind.VENTS
+        )
+
+    def _get_goal_entries(self, goal: tuple[int, int]) -> list[tuple[tuple[int, int], int]]:
+        """Returns the cells a goal is reached from, with the cost of the last step. That's the goal itself if it's in
+        a zone, or else the cells around it, ie: for a terminal."""
+
+        if self._get_walkable_zones(goal[0], goal[1]):
+            return [(goal, 0)]
+
+        return [
+            ((goal[0] + dx, goal[1] + dy), 1) for (dx, dy) in DIRECTIONS
+            if self._get_walkable_zones(goal[0] + dx, goal[1] + dy)
+        ]
+
+    def _get_route(
+            self,
+            goal: tuple[int, int],
+            entries: list[tuple[tuple[int, int], int]]
+    ) -> dict[tuple[int, int], float]:
+        """Returns the distance from every door to a goal, working it out over the doors the first time it's needed."""
+
+        route: Optional[dict[tuple[int, int], float]] = self.routes.get(goal)
+        if route is not None:
+            self.routes.move_to_end(goal)
+            return route
+
+        route = {}
+        frontier: list[tuple[float, tuple[int, int]]] = []
+        for (cell, last_step) in entries:
+            for zone_id in self._get_walkable_zones(cell[0], cell[1]):
+                for door in self._get_doors(zone_id):
+                    distance: float = self._get_door_map(zone_id, door).get(cell, math.inf) + last_step
+                    if distance < route.get(door, math.inf):
+                        route[door] = distance
+                        heapq.heappush(frontier, (distance, door))
+
+        while frontier:
+            (distance, door) = heapq.heappop(frontier)
+            if distance > route[door]:
+                continue
+
+            for zone_id in self._get_walkable_zones(door[0], door[1]):
+                for other_door in self._get_doors(zone_id):
+                    other_distance: float = distance + self._get_door_map(zone_id, door).get(other_door, math.inf)
+                    if other_distance < route.get(other_door, math.inf):
+                        route[other_door] = other_distance
+                        heapq.heappush(frontier, (other_distance, other_door))
+
+        if len(self.routes) >= MAX_ROUTES:
+            self.routes.popitem(last=False)
+        self.routes[goal] = route
+
+        return route
+
+    def _forget_routes(self, door: tuple[int, int], zone_ids: tuple[int, ...]) -> None:
+        """Forgets the routes that a door locking or unlocking could change: those that went through it, or that went
+        through (or ended in) any of the zones either side of it."""
+
+        doors: set[tuple[int, int]] = {door}
+        for zone_id in zone_ids:
+            doors.update(
+                (connection.x, connection.y) for connection in self.game_map.zones.zones[zone_id].connections
+            )
+
+        for goal in [
+            goal for (goal, route) in self.routes.items()
+            if not doors.isdisjoint(route) or any(
+                not set(zone_ids).isdisjoint(self._get_walkable_zones(cell[0], cell[1]))
+                for (cell, _) in self._get_goal_entries(goal)
+            )
+        ]:
+            del self.routes[goal]
+
+    def on_cell_changed(self, x: int, y: int) -> None:
+        """Called by the map when the walkable layer changes, ie: a door is opened. Opening or closing a door changes
+        nothing here, only locking or unlocking one does."""
+
+        super().on_cell_changed(x, y)
+
+        connection: Optional[zones.Connection] = self.game_map.zones.get_connection(x, y)
+        if connection is None:
+            # Not a door, so only the distances within the zone it's in can have changed.
+            zone_id: int = self.game_map.zones.get_zone(x, y)
+            if zone_id != zones.NO_ZONE:
+                self.door_maps.pop(zone_id, None)
+                self._forget_routes((x, y), (zone_id,))
+            return
+
+        if connection.is_vent() or connection.open != ((x, y) in self.locked):
+            return
+
+        if connection.open:
+            self.locked.discard((x, y))
+        else:
+            self.locked.add((x, y))
+        self._forget_routes((x, y), connection.zones)
+
+    def clear(self) -> None:
+        """Forgets every cached path and distance, ie: when the whole floor changes."""
+
+        super().clear()
+        self.door_maps = {}
+        self.routes = OrderedDict()
+        self.locked = {
+            cell for (cell, connection) in self.game_map.zones.connections.items()
+            if not connection.is_vent() and not connection.open
+        }
+
+    def get_step(self, start: tuple[int, int], goal: tuple[int, int]) -> Optional[tuple[int, int]]:
+        """Returns the direction of the next step from start toward goal, or None if there's no way there."""
+
+        zone_map: zones.ZoneMap = self.game_map.zones
+        start_zones: tuple[int, ...] = self._get_walkable_zones(start[0], start[1])
+        if not start_zones:
+            return super().get_step(start, goal)
+
+        entries: list[tuple[tuple[int, int], int]] = self._get_goal_entries(goal)
+        if not any(zone_map.can_reach(start, cell) for (cell, _) in entries):
+            return None
+
+        # In the same zone as the goal, so just find the way there cell by cell.
+        goal_zones: set[int] = {
+            zone_id for (cell, _) in entries for zone_id in self._get_walkable_zones(cell[0], cell[1])
+        }
+        if goal_zones.intersection(start_zones):
+            return super().get_step(start, goal)
+
+        # Otherwise head for whichever door of this zone is closest to the goal counting the way there from the door.
+        route: dict[tuple[int, int], float] = self._get_route(goal, entries)
+        best: Optional[dict[tuple[int, int], float]] = None
+        best_distance: float = math.inf
+        for zone_id in start_zones:
+            for door in self._get_doors(zone_id):
+                if door == start:
+                    continue
+
+                door_map: dict[tuple[int, int], float] = self._get_door_map(zone_id, door)
+                distance: float = door_map.get(start, math.inf) + route.get(door, math.inf)
+                if distance < best_distance:
+                    (best, best_distance) = (door_map, distance)
+
+        if best is None:
+            return None
+
+        # Walk downhill toward that door.
+        here: float = best[start]
+        step: Optional[tuple[int, int]] = None
+        for (dx, dy) in DIRECTIONS:
+            distance = best.get((start[0] + dx, start[1] + dy), math.inf)
+            if distance < here:
+                (step, here) = ((dx, dy), distance)
+
+        return step
@@ -0,0 +1,428 @@
+from __future__ import annotations
+from collections import deque
+from contextlib import nullcontext
+from typing import Any, ContextManager, Optional
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+import types
+
+
+# Returned instead of a real phase while timing is off, so timing a phase costs almost nothing.
+NULL_PHASE: ContextManager = nullcontext()
+
+
+class Phase:
+    """Times one run of a phase, for use in a with statement. Phases can be nested (ie: line of sight inside AI), in
+    which case the time spent in the inner phase is taken off the outer one's own time."""
+
+    def __init__(self, timer: PhaseTimer, name: str) -> None:
+        self.timer: PhaseTimer = timer
+        self.name: str = name
+        self.start: float = 0
+        self.nested_time: float = 0  # Seconds spent in phases run inside this one.
+
+    def __enter__(self) -> Phase:
+        self.timer.running.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        end: float = time.perf_counter()
+        self.timer.running.pop()
+        if self.timer.running:
+            self.timer.running[-1].nested_time += end - self.start
+
+        self.timer.record(self.name, self.start, end, end - self.start - self.nested_time)
+
+
+class PhaseTimer:
+    """Times the phases of each frame (rendering, input, updates and the parts of updates like AI and line of sight)
+    while turned on. Keeps a rolling history of milliseconds spent per phase per frame, not counting phases nested
+    inside it so nothing is counted twice, and every timed phase as a Chrome trace event so a slow turn can be looked
+    at in chrome://tracing or Perfetto."""
+
+    def __init__(self, history: int = 120, max_events: int = 200000) -> None:
+        self.enabled: bool = False
+
+        # Milliseconds spent in each phase itself (leaving out nested phases) during the current frame, and in each of
+        # the last few frames.
+        self.frame: dict[str, float] = {}
+        # Phases that have started but not finished, innermost last, and milliseconds spent in each phase that
+        # wasn't nested in another during the current frame.
+        self.running: list[Phase] = []
+        self.frame_totals: dict[str, float] = {}
+        self.history: dict[str, deque[float]] = {}
+        self.HISTORY: int = history
+
+        # How long each of the last few turns took to update and draw, in milliseconds.
+        self.latencies: deque[float] = deque(maxlen=history)
+
+        # Trace events in the Chrome trace event format. The oldest are dropped once there are too many.
+        self.events: deque[dict] = deque(maxlen=max_events)
+        self.start_time: float = time.perf_counter()
+
+    def phase(self, name: str) -> ContextManager:
+        """Returns something to time a phase with, ie: with timer.phase("ai"): ..."""
+
+        if not self.enabled:
+            return NULL_PHASE
+
+        return Phase(self, name)
+
+    def record(self, name: str, start: float, end: float, own_time: float) -> None:
+        """Records one run of a phase, along with the seconds spent in it outside any nested phases."""
+
+        self.frame[name] = self.frame.get(name, 0) + own_time * 1000
+        if not self.running:
+            self.frame_totals[name] = self.frame_totals.get(name, 0) + (end - start) * 1000
+        self.events.append({
+            "name": name,
+            "ph": "X",
+            "ts": (start - self.start_time) * 1000000,
+            "dur": (end - start) * 1000000,
+            "pid": 1,
+            "tid": 1
+        })
+
+    def end_frame(self) -> None:
+        """Called once a frame has been drawn, to move its timings into the history."""
+
+        if not self.enabled:
+            return
+
+        for name in self.history.keys() | self.frame.keys():
+            self.history.setdefault(name, deque(maxlen=self.HISTORY)).append(self.frame.get(name, 0))
+
+        self.latencies.append(self.frame_totals.get("updates", 0) + self.frame_totals.get("render", 0))
+        self.frame = {}
+        self.frame_totals = {}
+
+    def toggle(self) -> None:
+        """Turns timing on or off. Turning it on starts over with no history."""
+
+        self.enabled = not self.enabled
+        if self.enabled:
+            self.frame = {}
+            self.frame_totals = {}
+            self.history = {}
+            self.latencies.clear()
+            self.events.clear()
+
+    def get_average(self, name: str) -> float:
+        """Returns the average milliseconds per frame spent in a phase itself, leaving out nested phases, over the
+        history."""
+
+        samples: deque[float] = self.history.get(name, deque())
+        return sum(samples) / len(samples) if samples else 0
+
+    def get_percentile(self, percentile: float) -> float:
+        """Returns a percentile (0-100) of turn latency over the history, in milliseconds."""
+
+        if not self.latencies:
+            return 0
+
+        latencies: list[float] = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percentile / 100))]
+
+    def export_trace(self, path: str) -> None:
+        """Writes every recorded phase to a file in the Chrome trace event format."""
+
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": list(self.events), "displayTimeUnit": "ms"}, trace_file)
+
+
+class TurnProfiler:
+    """Runs cProfile over the next few turns, then saves what it found in three files:
+    prefix.pstats for pstats or snakeviz, prefix.collapsed with collapsed stacks for flamegraph tools, and
+    prefix.classes.txt with the time spent in the methods of each entity class."""
+
+    def __init__(self, entity_class: type, prefix: str = "profile") -> None:
+        # Every subclass of this counts as an entity class, ie: Actor, Camera, Explosive.
+        self.entity_class: type = entity_class
+        self.prefix: str = prefix
+
+        self.profile: Optional[cProfile.Profile] = None
+        self.turns: int = 0
+        self.turns_left: int = 0
+
+        # Calls that took less than this many microseconds along a stack are left out of the collapsed stacks.
+        self.MIN_STACK_TIME: float = 1
+
+    @staticmethod
+    def _get_frame_name(func: tuple[str, int, str]) -> str:
+        """Returns how a function is named in the collapsed stacks."""
+
+        (filename, line, name) = func
+        if filename == '~':
+            return name.replace(' ', '_').replace(';', ':')
+
+        return f"{name}({os.path.basename(filename)}:{line})"
+
+    def _get_entity_classes(self) -> list[type]:
+        """Returns the entity class and every class that inherits from it."""
+
+        classes: list[type] = [self.entity_class]
+        for class_ in classes:
+            classes.extend(subclass for subclass in class_.__subclasses__() if subclass not in classes)
+
+        return classes
+
+    def _get_collapsed_stacks(self, stats: pstats.Stats) -> dict[str, float]:
+        """Returns the microseconds spent in each stack of calls, as "outer;...;inner" strings.
+        cProfile only records who called who, not whole stacks, so a function's time is shared out among the stacks
+        that lead to it in proportion to how long each of its callers spent calling it."""
+
+        callees: dict[tuple, dict[tuple, float]] = {}
+        roots: list[tuple] = []
+        for (func, (_, _, _, cumulative, callers)) in stats.stats.items():
+            if not callers:
+                roots.append(func)
+            for (caller, caller_stats) in callers.items():
+                callees.setdefault(caller, {})[func] = caller_stats[3]
+
+        stacks: dict[str, float] = {}
+
+        # Each entry is a function, the stack leading to it and how much of its time belongs to that stack.
+        pending: list[tuple[tuple, tuple, float]] = [(root, (), 1) for root in roots]
+        while pending:
+            (func, stack, share) = pending.pop()
+            stack = stack + (func,)
+
+            own_time: float = stats.stats[func][2] * share * 1000000
+            if own_time >= self.MIN_STACK_TIME:
+                key: str = ';'.join(self._get_frame_name(frame) for frame in stack)
+                stacks[key] = stacks.get(key, 0) + own_time
+
+            for (callee, time_in_callee) in callees.get(func, {}).items():
+                callee_time: float = stats.stats[callee][3]
+                # Recursive calls are already counted in the time of the outer call.
+                if callee in stack or not callee_time:
+                    continue
+
+                callee_share: float = share * time_in_callee / callee_time
+                if callee_time * callee_share * 1000000 >= self.MIN_STACK_TIME:
+                    pending.append((callee, stack, callee_share))
+
+        return stacks
+
+    def _get_class_times(self, stats: pstats.Stats) -> list[tuple[str, float, int, str]]:
+        """Returns the name, seconds spent in its own methods, number of calls to them and slowest method of each
+        entity class, slowest first. Inherited methods count toward the class they're written in."""
+
+        # Which class each method was written in, by where its code is.
+        owners: dict[tuple[str, int, str], type] = {}
+        for class_ in self._get_entity_classes():
+            for attribute in vars(class_).values():
+                if isinstance(attribute, property):
+                    functions = (attribute.fget, attribute.fset)
+                else:
+                    functions = (getattr(attribute, "__func__", attribute),)
+
+                for function in functions:
+                    code: Any = getattr(function, "__code__", None)
+                    if code is not None:
+                        owners[(code.co_filename, code.co_firstlineno, code.co_name)] = class_
+
+        totals: dict[type, list] = {}
+        for (func, (_, calls, own_time, _, _)) in stats.stats.items():
+            class_: Optional[type] = owners.get(func)
+            if class_ is None:
+                continue
+
+            total: list = totals.setdefault(class_, [0, 0, None, 0])
+            total[0] += own_time
+            total[1] += calls
+            if own_time >= total[3]:
+                total[2] = func[2]
+                total[3] = own_time
+
+        return sorted(
+            (
+                (class_.__name__, own_time, calls, slowest)
+                for (class_, (own_time, calls, slowest, _)) in totals.items()
+            ),
+            key=lambda class_time: class_time[1],
+            reverse=True
+        )
+
+    def is_running(self) -> bool:
+        """Returns whether turns are being profiled."""
+
+        return self.profile is not None
+
+    def start(self, turns: int) -> None:
+        """Starts profiling for a number of turns. Does nothing if already profiling."""
+
+        if self.is_running() or turns <= 0:
+            return
+
+        self.turns = turns
+        self.turns_left = turns
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def end_turn(self) -> bool:
+        """Called at the end of each turn. Returns whether that was the last turn to profile, in which case the
+        results have been saved."""
+
+        if not self.is_running():
+            return False
+
+        self.turns_left -= 1
+        if self.turns_left > 0:
+            return False
+
+        self.stop()
+        return True
+
+    def stop(self) -> None:
+        """Stops profiling and saves the results."""
+
+        self.profile.disable()
+        stats: pstats.Stats = pstats.Stats(self.profile)
+        self.profile = None
+
+        stats.dump_stats(f"{self.prefix}.pstats")
+
+        with open(f"{self.prefix}.collapsed", "w") as collapsed_file:
+            for (stack, microseconds) in sorted(self._get_collapsed_stacks(stats).items()):
+                collapsed_file.write(f"{stack} {round(microseconds)}\n")
+
+        with open(f"{self.prefix}.classes.txt", "w") as classes_file:
+            classes_file.write(f"{'Class':<16}{'Own time (s)':>14}{'Calls':>10}  Slowest method\n")
+            for (name, own_time, calls, slowest) in self._get_class_times(stats):
+                classes_file.write(f"{name:<16}{own_time:>14.4f}{calls:>10}  {slowest}\n")
+
+
+def get_retained_size(obj: Any, seen: set[int], stop: set[int]) -> int:
+    """Returns the bytes taken up by an object and everything it holds on to, not counting objects in seen (which have
+    already been counted, and get added to it) or stop (which belong to something else, like the rest of the floor)."""
+
+    size: int = 0
+    pending: list[Any] = [obj]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or id(obj) in stop or isinstance(obj, (type, types.ModuleType, types.FunctionType)):
+            continue
+
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            pending.extend(obj)
+
+        if hasattr(obj, "__dict__"):
+            pending.append(vars(obj))
+
+    return size
+
+
+class MemoryTracker:
+    """Writes reports of how much memory is held by each kind of entity, each inventory and each section of the game
+    data. Each report also takes a tracemalloc snapshot, saved so it can be compared later, and lists what grew the
+    most since the report before it."""
+
+    def __init__(self, prefix: str = "memory") -> None:
+        self.prefix: str = prefix
+        self.reports: int = 0
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+
+        # How many frames of the stack to keep for each allocation, and how many of the biggest changes to list.
+        self.FRAMES: int = 5
+        self.TOP_CHANGES: int = 10
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        """Takes a tracemalloc snapshot, leaving out tracemalloc and this file. Starts tracing first if it isn't
+        already, in which case the snapshot is just a starting point for the next one to be compared to."""
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.FRAMES)
+
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)
+        ))
+
+    def report(self, entity_manager: Any) -> str:
+        """Writes a report on what's in memory and returns the name of the file it was written to."""
+
+        self.reports += 1
+        path: str = f"{self.prefix}_{self.reports}.txt"
+
+        # The snapshot is taken first so it doesn't include what's allocated to make the report.
+        snapshot: tracemalloc.Snapshot = self._take_snapshot()
+        snapshot.dump(f"{self.prefix}_{self.reports}.snapshot")
+
+        entities: list[Any] = list(entity_manager.all)
+        live_entities: set[int] = {id(entity_) for entity_ in entities}
+        game_data: Any = entities[0].game_data if entities else None
+        game_interface: Any = entities[0].game_interface if entities else None
+
+        # Everything shared by the whole floor, so it isn't counted toward whichever entity happens to reach it first.
+        shared: set[int] = {id(entity_manager), id(entity_manager.game_map), id(game_data), id(game_interface)}
+        shared |= {id(value) for value in vars(entity_manager).values()}
+        shared |= live_entities
+        for list_ in (entity_manager.actors, entity_manager.explosives):
+            shared |= {id(entity_) for entity_ in list_}
+
+        seen: set[int] = set()
+        lines: list[str] = []
+
+        # The game data goes first, since entities share bits of it (ie: the colors of their tiles).
+        lines.append(f"{'Game data':<24}{'Entries':>10}{'Bytes':>12}")
+        if game_data is not None:
+            for (section, data) in vars(game_data).items():
+                lines.append(f"{section:<24}{len(data):>10}{get_retained_size(data, seen, shared):>12}")
+
+        # Then inventories, since they would otherwise be counted as part of whoever is carrying them.
+        lines.append('')
+        lines.append(f"{'Inventory':<24}{'Slots':>10}{'Bytes':>12}")
+        for entity_ in entities:
+            inventory: Any = getattr(entity_, "inventory", None)
+            if inventory is not None:
+                owner: str = f"{entity_.name} ({entity_.x}, {entity_.y})"
+                lines.append(f"{owner:<24}{len(inventory):>10}{get_retained_size(inventory, seen, shared):>12}")
+
+        # Then every entity on the floor, by class.
+        classes: dict[str, list[int]] = {}
+        for entity_ in entities:
+            total: list[int] = classes.setdefault(type(entity_).__name__, [0, 0])
+            total[0] += 1
+            total[1] += sys.getsizeof(entity_) + get_retained_size(vars(entity_), seen, shared)
+
+        lines.append('')
+        lines.append(f"{'Entity class':<24}{'Count':>10}{'Bytes':>12}")
+        for (name, (count, size)) in sorted(classes.items(), key=lambda class_: class_[1][1], reverse=True):
+            lines.append(f"{name:<24}{count:>10}{size:>12}")
+
+        # Things that should have been let go of by now.
+        dead_actors: int = sum(1 for actor_ in entity_manager.actors if actor_.health <= 0)
+        removed_explosives: int = sum(
+            1 for explosive in entity_manager.explosives if id(explosive) not in live_entities
+        )
+        lines.append('')
+        lines.append(f"Dead actors still in actors: {dead_actors}")
+        lines.append(f"Explosives still in explosives after being removed: {removed_explosives}")
+
+        # Compare allocations to the last report, or start tracing them if this is the first.
+        lines.append('')
+        if self.snapshot is None:
+            lines.append("Allocations will be compared from the next report on.")
+        else:
+            lines.append(f"Biggest changes in allocations since report {self.reports - 1}:")
+            for stat in snapshot.compare_to(self.snapshot, "lineno")[:self.TOP_CHANGES]:
+                lines.append(str(stat))
+        self.snapshot = snapshot
+
+        with open(path, "w") as report_file:
+            report_file.write('\n'.join(lines) + '\n')
+
+        return path
@@ -1,4 +1,5 @@
 from typing import Any, Optional
+import tcod
 
 
 def render(
@@ -30,3 +31,19 @@ def present_surface(window: Any, surface: Any) -> None:
 
     # if TCOD:
     window.present(surface)
+
+
+def create_surface(width: int, height: int) -> Any:
+    """ Generic create surface function which will decide which specific function to
+        call depending on which mode the game is in. """
+
+    # if TCOD:
+    return tcod.Console(width, height, order='F')
+
+
+def blit_surface(src: Any, dest: Any, x: int, y: int) -> None:
+    """ Generic blit function which copies a whole surface onto another at x, y, and will decide which
+        specific function to call depending on which mode the game is in. """
+
+    # if TCOD:
+    src.blit(dest, dest_x=x, dest_y=y)
@@ -0,0 +1,230 @@
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Callable, Iterator, Optional, Union
+import argparse
+import json
+import os
+import random
+import time
+import numpy
+import databases
+import game_engine
+import input
+import main
+
+
+def _press(engine: game_engine.GameEngine, key: Union[input.Key, str]) -> None:
+    """Presses a key and lets the game run until the player is waiting for the next one."""
+
+    engine.state.handle_input(key)
+    engine.handle_updates()
+    while engine.is_busy():
+        engine.handle_updates()
+
+
+def explore_player(engine: game_engine.GameEngine) -> None:
+    """Explores the floor and picks up whatever it finds, resting whenever it can't explore."""
+
+    player_ = engine.player
+    if engine.entities.get_items_at(player_.x, player_.y):
+        _press(engine, input.Key.COMMA)
+        return
+
+    game_time: int = engine.entities.game_time
+    _press(engine, 'o')
+    if engine.entities.game_time == game_time:
+        _press(engine, input.Key.PERIOD)
+
+
+def random_player(engine: game_engine.GameEngine) -> None:
+    """Wanders around at random, bumping into whatever is in the way."""
+
+    _press(engine, random.choice((input.Key.UP, input.Key.DOWN, input.Key.LEFT, input.Key.RIGHT, input.Key.PERIOD)))
+
+
+def bot_player(engine: game_engine.GameEngine) -> None:
+    """Lets the bot play a turn."""
+
+    engine.state.start_bot(1)
+    while engine.is_busy():
+        engine.handle_updates()
+
+
+# The ways a simulated player can play, by name. Each presses keys until the player has taken at least one turn.
+PLAYERS: dict[str, Callable[[game_engine.GameEngine], None]] = {
+    "bot": bot_player,
+    "explore": explore_player,
+    "random": random_player
+}
+
+
+def run_game(seed: int, player_name: str, max_time: int, max_inputs: int) -> dict:
+    """Plays a whole game without drawing anything and returns how it went. Runs in a worker process, so everything it
+    needs is passed in and everything it returns can be pickled."""
+
+    random.seed(seed)
+    start: float = time.perf_counter()
+
+    game_data: databases.Databases = databases.Databases()
+    game_data.load_from_files()
+    engine: game_engine.GameEngine = main.new_game(game_data, None, None)
+    play: Callable[[game_engine.GameEngine], None] = PLAYERS[player_name]
+
+    died: bool = False
+    inputs: int = 0
+    # How long each turn took to play, in milliseconds.
+    turn_times: list[float] = []
+    try:
+        while engine.entities.game_time < max_time and inputs < max_inputs:
+            turn_start: float = time.perf_counter()
+            play(engine)
+            turn_times.append((time.perf_counter() - turn_start) * 1000)
+            inputs += 1
+    except SystemExit:
+        # The game quits when the player dies.
+        died = True
+
+    turn_times.sort()
+
+    game_map = engine.entities.game_map
+    walkable: numpy.ndarray = numpy.array(game_map.move_costs, dtype=bool)
+    explored: numpy.ndarray = game_map.fog.get_explored() & walkable
+    seconds: float = time.perf_counter() - start
+
+    return {
+        "seed": seed,
+        "player": player_name,
+        "died": died,
+        "cause": engine.player.killed_by,
+        "floor": engine.state.floor_on,
+        "game_time": engine.entities.game_time,
+        "inputs": inputs,
+        "health": engine.player.health,
+        "kills": sum(1 for actor_ in engine.entities.actors if actor_ is not engine.player and actor_.health <= 0),
+        "alarms": sum(1 for camera_ in engine.entities.cameras if camera_.triggered),
+        "items": len(engine.player.inventory),
+        "explored": float(explored.sum() / max(1, walkable.sum())),
+        "seconds": seconds,
+        "ticks_per_second": engine.entities.game_time / seconds if seconds else 0,
+        "turn_ms": sum(turn_times) / len(turn_times) if turn_times else 0,
+        "turn_ms_p95": turn_times[int(len(turn_times) * 0.95)] if turn_times else 0,
+        "turn_ms_max": turn_times[-1] if turn_times else 0
+    }
+
+
+class Metrics:
+    """Adds up the results of games as they finish."""
+
+    # The results averaged over every game.
+    AVERAGED: tuple[str, ...] = (
+        "game_time", "inputs", "health", "kills", "alarms", "items", "explored", "floor", "seconds",
+        "ticks_per_second", "turn_ms", "turn_ms_p95", "turn_ms_max"
+    )
+
+    def __init__(self) -> None:
+        self.games: int = 0
+        self.deaths: int = 0
+        self.causes: dict[str, int] = {}  # How many deaths each killer caused.
+        self.totals: dict[str, float] = {name: 0 for name in self.AVERAGED}
+        self.lowest: dict[str, float] = {}
+        self.highest: dict[str, float] = {}
+
+    def add(self, result: dict) -> None:
+        """Adds the result of a game."""
+
+        self.games += 1
+        self.deaths += result["died"]
+        if result["died"]:
+            cause: str = result["cause"] or "unknown"
+            self.causes[cause] = self.causes.get(cause, 0) + 1
+        for name in self.AVERAGED:
+            self.totals[name] += result[name]
+            self.lowest[name] = min(self.lowest.get(name, result[name]), result[name])
+            self.highest[name] = max(self.highest.get(name, result[name]), result[name])
+
+    def get_summary(self) -> str:
+        """Returns the average, lowest and highest of each result so far."""
+
+        lines: list[str] = [f"{self.games} games, {self.deaths} deaths ({self.deaths / max(1, self.games):.0%})"]
+        for (cause, deaths) in sorted(self.causes.items(), key=lambda item: -item[1]):
+            lines.append(f"  killed by {cause}: {deaths}")
+        for name in self.AVERAGED:
+            lines.append(
+                f"  {name:<18}avg {self.totals[name] / max(1, self.games):>10.2f}"
+                f"  min {self.lowest.get(name, 0):>10.2f}  max {self.highest.get(name, 0):>10.2f}"
+            )
+
+        return '\n'.join(lines)
+
+
+def run_games(
+        games: int,
+        seed: int,
+        player_name: str,
+        max_time: int,
+        max_inputs: int,
+        workers: Optional[int],
+        jsonl_path: Optional[str]
+) -> Metrics:
+    """Plays games with seeds seed, seed + 1... across worker processes, printing each result as it comes in along
+    with the running totals. Only a few games more than there are workers are queued at a time, and each result is
+    let go of once it's been added up, so any number of games can be played."""
+
+    metrics: Metrics = Metrics()
+    jsonl_file = open(jsonl_path, "w") if jsonl_path else None
+
+    seeds: Iterator[int] = iter(range(seed, seed + games))
+    window: int = 2 * (workers or os.cpu_count() or 1)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: set[Future] = {
+                executor.submit(run_game, game_seed, player_name, max_time, max_inputs)
+                for (_, game_seed) in zip(range(window), seeds)
+            }
+
+            while pending:
+                (done, pending) = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result: dict = future.result()
+                    metrics.add(result)
+
+                    print(
+                        f"[{metrics.games}/{games}] seed {result['seed']}: "
+                        f"{'killed by ' + str(result['cause']) if result['died'] else 'survived'} "
+                        f"at time {result['game_time']} on floor {result['floor']}, "
+                        f"{result['kills']} kills, {result['explored']:.0%} explored, {result['seconds']:.2f}s, "
+                        f"{result['turn_ms']:.2f}ms a turn (deaths so far {metrics.deaths}/{metrics.games})",
+                        flush=True
+                    )
+                    if jsonl_file is not None:
+                        jsonl_file.write(json.dumps(result) + '\n')
+                        jsonl_file.flush()
+
+                    # Keep the queue topped up.
+                    game_seed = next(seeds, None)
+                    if game_seed is not None:
+                        pending.add(executor.submit(run_game, game_seed, player_name, max_time, max_inputs))
+    finally:
+        if jsonl_file is not None:
+            jsonl_file.close()
+
+    return metrics
+
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Plays many games without a window, in parallel, and reports how they went."
+    )
+    parser.add_argument("--games", type=int, default=10, help="how many games to play")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first game, each game after adds one")
+    parser.add_argument("--player", choices=sorted(PLAYERS), default="explore", help="how the player plays")
+    parser.add_argument("--max-time", type=int, default=2000, help="stop each game once this much time has passed")
+    parser.add_argument("--max-inputs", type=int, default=1000, help="stop each game after this many key presses")
+    parser.add_argument("--workers", type=int, default=None, help="how many processes to use (default: one per CPU)")
+    parser.add_argument("--jsonl", default=None, help="also write each game's results to this file as JSON lines")
+    args: argparse.Namespace = parser.parse_args()
+
+    print(run_games(
+        args.games, args.seed, args.player, args.max_time, args.max_inputs, args.workers, args.jsonl
+    ).get_summary())
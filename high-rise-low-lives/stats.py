@@ -0,0 +1,54 @@
+from __future__ import annotations
+from typing import Optional
+
+
+class TimedStat:
+    """A number that changes by a fixed step every so many ticks, like health recovering or charge draining.
+    Instead of being changed every tick, it remembers its value at the time it was last set and works out the current
+    value from that whenever it's read."""
+
+    def __init__(
+            self,
+            value: int,
+            game_time: int,
+            period: Optional[int] = None,
+            step: int = 0,
+            phase: int = 0,
+            limit: Optional[int] = None
+    ) -> None:
+        self.value: int = value
+        self.time: int = game_time  # When the value was last set.
+
+        # The value changes by step on every tick where (tick - phase) is a multiple of period, but never past limit.
+        # With no period it never changes on its own.
+        self.period: Optional[int] = period
+        self.step: int = step
+        self.phase: int = phase
+        self.limit: Optional[int] = limit
+
+    def get_steps(self, game_time: int) -> int:
+        """Returns how many times the value has stepped since it was last set."""
+
+        if self.period is None or game_time <= self.time:
+            return 0
+
+        return (game_time - self.phase) // self.period - (self.time - self.phase) // self.period
+
+    def get(self, game_time: int) -> int:
+        """Returns the value at a point in time."""
+
+        steps: int = self.get_steps(game_time)
+        if not steps:
+            return self.value
+
+        value: int = self.value + steps * self.step
+        if self.limit is not None:
+            value = min(value, self.limit) if self.step > 0 else max(value, self.limit)
+
+        return value
+
+    def set(self, value: int, game_time: int) -> None:
+        """Sets the value as of a point in time."""
+
+        self.value = value
+        self.time = game_time
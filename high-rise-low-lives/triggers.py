@@ -0,0 +1,80 @@
+from __future__ import annotations
+from typing import Any, Callable, Optional
+import game_entities.actor
+
+
+class TriggerVolume:
+    """A set of cells owned by an entity (ie: a trap's cell or a camera's FOV) that calls back whenever an actor
+    steps into or out of it."""
+
+    def __init__(
+            self,
+            owner: Any,
+            cells: set[tuple[int, int]],
+            on_enter: Optional[Callable[[game_entities.actor.Actor], None]] = None,
+            on_exit: Optional[Callable[[game_entities.actor.Actor], None]] = None
+    ) -> None:
+        self.owner: Any = owner
+        self.cells: frozenset[tuple[int, int]] = frozenset(cells)
+        self.on_enter: Optional[Callable[[game_entities.actor.Actor], None]] = on_enter
+        self.on_exit: Optional[Callable[[game_entities.actor.Actor], None]] = on_exit
+
+
+class TriggerVolumes:
+    """Keeps every trigger volume indexed by cell, so the only work done to detect actors is a lookup whenever one
+    of them moves. Nothing at all is done on ticks where nobody moves."""
+
+    def __init__(self, game_entities_: Any) -> None:
+        self.game_entities: Any = game_entities_
+        self.volumes_at: dict[tuple[int, int], list[TriggerVolume]] = {}
+
+    def _fire(self, volumes: set[TriggerVolume], actor_: game_entities.actor.Actor, entering: bool) -> None:
+        """Calls the enter or exit callbacks of some volumes for an actor."""
+
+        for volume in volumes:
+            if volume.owner is actor_:
+                continue
+
+            callback: Optional[Callable[[game_entities.actor.Actor], None]] = \
+                volume.on_enter if entering else volume.on_exit
+            if callback is not None:
+                callback(actor_)
+
+    def add(self, volume: TriggerVolume) -> None:
+        """Starts watching a volume, triggering it for any living actors already standing in it."""
+
+        for cell in volume.cells:
+            self.volumes_at.setdefault(cell, []).append(volume)
+
+        for actor_ in self.game_entities.actors:
+            if actor_.health > 0 and (actor_.x, actor_.y) in volume.cells:
+                self._fire({volume}, actor_, True)
+
+    def remove(self, volume: TriggerVolume) -> None:
+        """Stops watching a volume. No exit callbacks are called."""
+
+        for cell in volume.cells:
+            volumes: list[TriggerVolume] = self.volumes_at[cell]
+            volumes.remove(volume)
+            if not volumes:
+                del self.volumes_at[cell]
+
+    def actor_moved(self, actor_: game_entities.actor.Actor, old_x: int, old_y: int) -> None:
+        """Called after an actor moves from old_x, old_y, to trigger the volumes it left and entered."""
+
+        old_volumes: set[TriggerVolume] = set(self.volumes_at.get((old_x, old_y), ()))
+        new_volumes: set[TriggerVolume] = set(self.volumes_at.get((actor_.x, actor_.y), ()))
+
+        if old_volumes or new_volumes:
+            self._fire(old_volumes - new_volumes, actor_, False)
+            self._fire(new_volumes - old_volumes, actor_, True)
+
+    def actor_placed(self, actor_: game_entities.actor.Actor) -> None:
+        """Called when an actor appears on the floor, to trigger any volumes it appeared in."""
+
+        self._fire(set(self.volumes_at.get((actor_.x, actor_.y), ())), actor_, True)
+
+    def actor_removed(self, actor_: game_entities.actor.Actor) -> None:
+        """Called when an actor leaves the floor (ie: dies), to let the volumes it was in know it's gone."""
+
+        self._fire(set(self.volumes_at.get((actor_.x, actor_.y), ())), actor_, False)
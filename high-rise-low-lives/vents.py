@@ -0,0 +1,67 @@
+from __future__ import annotations
+from enum import Enum, auto
+import numpy
+import map
+import zones
+
+
+class Plane(Enum):
+    """The planes of a floor the player can be on, each drawn on its own."""
+
+    FLOOR: int = auto(),
+    VENTS: int = auto()
+
+
+class VentNetwork:
+    """The vents of a floor as a plane of their own, laid over the floor and joined to it only at the entrances.
+    Which cells are vents or entrances is kept as a layer so moving through the vents is checked in O(1), and each
+    network of connected vents is a zone of the ZoneMap, so its entrances are the zone's connections."""
+
+    def __init__(self, game_map: map.Map) -> None:
+        self.game_map: map.Map = game_map
+
+        # Whether each cell is a vent, and whether it's an entrance, indexed [x, y].
+        self.cells: numpy.ndarray = numpy.zeros((0, 0), dtype=bool)
+        self.entrances: numpy.ndarray = numpy.zeros((0, 0), dtype=bool)
+
+    def build(self) -> None:
+        """Builds the vent layer from the vents on the floor, ie: when the floor is built."""
+
+        self.cells = numpy.zeros((self.game_map.width, self.game_map.height), dtype=bool)
+        self.entrances = numpy.zeros((self.game_map.width, self.game_map.height), dtype=bool)
+
+        for vent_ in self.game_map.game_entities.vents:
+            self.cells[vent_.x, vent_.y] = True
+            self.entrances[vent_.x, vent_.y] = vent_.entrance
+
+    def is_vent(self, x: int, y: int) -> bool:
+        """Returns whether a cell is part of the vents, entrances included."""
+
+        return bool(self.cells.size) and self.game_map.in_bounds(x, y) and bool(self.cells[x, y])
+
+    def is_entrance(self, x: int, y: int) -> bool:
+        """Returns whether a cell is a vent entrance."""
+
+        return bool(self.entrances.size) and self.game_map.in_bounds(x, y) and bool(self.entrances[x, y])
+
+    def get_network(self, x: int, y: int) -> int:
+        """Returns the zone of the network of vents a cell is in, or NO_ZONE if it isn't a vent."""
+
+        return self.game_map.zones.get_zone(x, y) if self.is_vent(x, y) else zones.NO_ZONE
+
+    def get_entrances(self, network: int) -> list[tuple[int, int]]:
+        """Returns the entrances of a network of vents, ie: where the player can get out."""
+
+        if network == zones.NO_ZONE:
+            return []
+
+        return [
+            (connection.x, connection.y) for connection in self.game_map.zones.zones[network].connections
+            if connection.is_vent()
+        ]
+
+    def is_connected(self, start: tuple[int, int], goal: tuple[int, int]) -> bool:
+        """Returns whether one vent can be crawled to from another without leaving the vents."""
+
+        network: int = self.get_network(start[0], start[1])
+        return network != zones.NO_ZONE and network == self.get_network(goal[0], goal[1])
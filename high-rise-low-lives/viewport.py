@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+
+class Viewport:
+    """The part of the floor shown in the map area of the screen. Floors can be bigger than the screen, so the viewport
+    scrolls to keep whatever is being looked at (usually the player) away from its edges."""
+
+    def __init__(self, width: int = 0, height: int = 0) -> None:
+        # The map cell shown in the top-left corner of the map area.
+        self.x: int = 0
+        self.y: int = 0
+
+        self.width: int = 0
+        self.height: int = 0
+        self.margin_x: int = 0
+        self.margin_y: int = 0
+        self.set_size(width, height)
+
+    def set_size(self, width: int, height: int) -> None:
+        """Sets how many cells across and down the map area of the screen is."""
+
+        self.width = width
+        self.height = height
+
+        # How close to an edge something being looked at can get before the viewport scrolls.
+        self.margin_x = width // 4
+        self.margin_y = height // 4
+
+    def show(self, x: int, y: int, map_width: int, map_height: int) -> None:
+        """Scrolls as little as needed to keep a cell away from the edges, without scrolling past the edges of the
+        floor."""
+
+        if x < self.x + self.margin_x:
+            self.x = x - self.margin_x
+        elif x >= self.x + self.width - self.margin_x:
+            self.x = x - self.width + self.margin_x + 1
+
+        if y < self.y + self.margin_y:
+            self.y = y - self.margin_y
+        elif y >= self.y + self.height - self.margin_y:
+            self.y = y - self.height + self.margin_y + 1
+
+        self.x = max(0, min(self.x, map_width - self.width))
+        self.y = max(0, min(self.y, map_height - self.height))
+
+    def contains(self, x: int, y: int) -> bool:
+        """Returns whether a map cell is shown on the screen."""
+
+        return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
+
+    def to_screen(self, x: int, y: int) -> tuple[int, int]:
+        """Converts map coordinates to screen coordinates."""
+
+        return x - self.x, y - self.y
+
+    def to_map(self, x: int, y: int) -> tuple[int, int]:
+        """Converts screen coordinates to map coordinates."""
+
+        return x + self.x, y + self.y
+
+    def get_buckets(self, bucket_size: int) -> list[tuple[int, int]]:
+        """Returns every bucket of a spatial index with buckets of bucket_size cells that overlaps the viewport."""
+
+        return [
+            (bucket_x, bucket_y)
+            for bucket_x in range(self.x // bucket_size, (self.x + self.width - 1) // bucket_size + 1)
+            for bucket_y in range(self.y // bucket_size, (self.y + self.height - 1) // bucket_size + 1)
+        ]
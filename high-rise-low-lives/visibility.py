@@ -0,0 +1,94 @@
+from __future__ import annotations
+import numpy
+import fov
+import map
+
+
+class VisibilityMatrix:
+    """Stores which cells can be seen from every other cell on a floor, so "can A see B?" is a single lookup instead
+    of walking a line past every entity.
+    Each cell gets a row of bits (one per cell on the floor) packed eight to a byte, so the matrix takes
+    (width * height) ** 2 / 8 bytes. It is built when the floor is loaded and patched when a door opens or closes."""
+
+    def __init__(self, game_map: map.Map) -> None:
+        self.game_map: map.Map = game_map
+        self.width: int = 0
+        self.height: int = 0
+
+        # The transparency layer the matrix was last built from, to tell which changes actually affect sight.
+        self.transparency: numpy.ndarray = numpy.zeros((0, 0), dtype=bool)
+        self.rows: numpy.ndarray = numpy.zeros((0, 0), dtype=numpy.uint8)
+
+        game_map.cell_listeners.append(self.on_cell_changed)
+
+    def _index(self, x: int, y: int) -> int:
+        """Returns the position of a cell's row (or bit within a row)."""
+
+        return x * self.height + y
+
+    def _compute_row(self, x: int, y: int) -> None:
+        """Works out everything that can be seen from a single cell. A cell that can't be seen through can still see
+        out (ie: a camera mounted on a wall), so it's treated as see-through while working out its own row."""
+
+        opaque: bool = not self.transparency[x, y]
+        self.transparency[x, y] = True
+        self.rows[self._index(x, y)] = numpy.packbits(fov.compute_fov(self.transparency, x, y).ravel())
+        self.transparency[x, y] = not opaque
+
+    def build(self) -> None:
+        """Builds the whole matrix from the map's transparency layer."""
+
+        self.width = self.game_map.width
+        self.height = self.game_map.height
+        self.transparency = self.game_map.transparency.copy()
+        self.rows = numpy.zeros((self.width * self.height, (self.width * self.height + 7) // 8), dtype=numpy.uint8)
+
+        for x in range(self.width):
+            for y in range(self.height):
+                self._compute_row(x, y)
+
+    def on_cell_changed(self, x: int, y: int) -> None:
+        """Called by the map when something changes at a cell. If it became see-through or stopped being so (ie: a door
+        opened or closed), only the cells that could see it or the cells around it need their rows worked out again,
+        since nothing else had a line of sight passing through it."""
+
+        if not self.rows.size or self.transparency[x, y] == self.game_map.transparency[x, y]:
+            return
+
+        self.transparency[x, y] = self.game_map.transparency[x, y]
+
+        # Walls are lit when seen, so a cell that could see up to the changed cell without seeing it can start to
+        # when it closes. Anything that saw a cell next to it is worked out again too, to catch those.
+        changed: set[int] = {self._index(x, y)}
+        for neighbour_x in range(max(0, x - 1), min(self.width, x + 2)):
+            for neighbour_y in range(max(0, y - 1), min(self.height, y + 2)):
+                column: int = self._index(neighbour_x, neighbour_y)
+                changed.update(numpy.nonzero(self.rows[:, column >> 3] & (0x80 >> (column & 7)))[0].tolist())
+
+        for index in changed:
+            self._compute_row(index // self.height, index % self.height)
+
+    def can_see(self, x1: int, y1: int, x2: int, y2: int) -> bool:
+        """Returns whether the cell at x2, y2 can be seen from the cell at x1, y1."""
+
+        if not (self.game_map.in_bounds(x1, y1) and self.game_map.in_bounds(x2, y2)):
+            return False
+
+        column: int = self._index(x2, y2)
+        return bool(self.rows[self._index(x1, y1), column >> 3] & (0x80 >> (column & 7)))
+
+    def get_visible_from(self, x: int, y: int) -> numpy.ndarray:
+        """Returns a boolean array of every cell that can be seen from a cell, indexed [x, y]."""
+
+        if not self.game_map.in_bounds(x, y):
+            return numpy.zeros((self.width, self.height), dtype=bool)
+
+        cell_count: int = self.width * self.height
+        return numpy.unpackbits(self.rows[self._index(x, y)], count=cell_count).reshape(
+            (self.width, self.height)
+        ).astype(bool)
+
+    def get_memory_usage(self) -> int:
+        """Returns how many bytes the matrix takes up."""
+
+        return self.rows.nbytes + self.transparency.nbytes
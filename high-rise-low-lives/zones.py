@@ -0,0 +1,273 @@
+from __future__ import annotations
+from collections import Counter
+from enum import Enum, auto
+from typing import Optional
+import numpy
+import map
+import pathfinding
+import game_entities.door
+import game_entities.tile
+
+
+# The zone of a cell that isn't part of any, ie: walls and doors.
+NO_ZONE: int = -1
+
+
+class Zone:
+    """A room, corridor or vent network: a patch of the floor that can be crossed without going through a door."""
+
+    class Kind(Enum):
+        """What sort of place a zone is."""
+
+        ROOM: int = auto(),
+        CORRIDOR: int = auto(),
+        VENTS: int = auto()
+
+    def __init__(self, zone_id: int, kind: Zone.Kind) -> None:
+        self.id: int = zone_id
+        self.kind: Zone.Kind = kind
+        self.size: int = 0  # How many cells it covers.
+        self.connections: list[Connection] = []
+
+
+class Connection:
+    """A way between zones: a door, or a vent entrance between the vents and the room it opens onto."""
+
+    def __init__(self, x: int, y: int, zones: tuple[int, ...], door: Optional[game_entities.door.Door]) -> None:
+        self.x: int = x
+        self.y: int = y
+        self.zones: tuple[int, ...] = zones
+        self.door: Optional[game_entities.door.Door] = door
+        self.open: bool = door is None or not door.locked  # Whether it can be passed through, ie: not locked.
+
+    def is_vent(self) -> bool:
+        """Returns whether this is a vent entrance rather than a door."""
+
+        return self.door is None
+
+
+class ZoneMap:
+    """Splits the floor into zones (rooms, corridors and vent networks) and keeps a graph of the doors and vent
+    entrances connecting them.
+    Every cell's zone is labelled once when the floor is built so finding it is O(1). Doors locking or unlocking never
+    change the labels, only the graph: an unlocked door merges the regions of the zones either side of it straight
+    away, and a locked one marks the regions to be worked out again over the graph (not the cells) next time they're
+    needed."""
+
+    def __init__(self, game_map: map.Map) -> None:
+        self.game_map: map.Map = game_map
+
+        # The zone each cell is in, indexed [x, y].
+        self.labels: numpy.ndarray = numpy.full((0, 0), NO_ZONE, dtype=numpy.int32)
+        self.zones: list[Zone] = []
+        self.connections: dict[tuple[int, int], Connection] = {}
+
+        # Which region (set of zones reachable from each other) each zone is in, walking only or using the vents too.
+        self.regions: dict[bool, list[int]] = {False: [], True: []}
+        # Whether a connection closed since the regions were worked out.
+        self.dirty: bool = False
+
+        game_map.cell_listeners.append(self.on_cell_changed)
+
+    def _label(self, cells: set[tuple[int, int]], kind_of: dict[tuple[int, int], Zone.Kind]) -> None:
+        """Floods each group of touching cells with a new zone, of whichever kind most of its cells are."""
+
+        for start in cells:
+            if self.labels[start] != NO_ZONE:
+                continue
+
+            zone_: Zone = Zone(len(self.zones), Zone.Kind.ROOM)
+            self.zones.append(zone_)
+            self.labels[start] = zone_.id
+            frontier: list[tuple[int, int]] = [start]
+            kinds: Counter[Zone.Kind] = Counter()
+
+            while frontier:
+                (x, y) = frontier.pop()
+                zone_.size += 1
+                kinds[kind_of.get((x, y), Zone.Kind.ROOM)] += 1
+                for (dx, dy) in pathfinding.DIRECTIONS:
+                    cell: tuple[int, int] = (x + dx, y + dy)
+                    if cell in cells and self.labels[cell] == NO_ZONE:
+                        self.labels[cell] = zone_.id
+                        frontier.append(cell)
+
+            zone_.kind = kinds.most_common(1)[0][0]
+
+    def _connect(self, x: int, y: int, door: Optional[game_entities.door.Door]) -> None:
+        """Adds a connection at a cell between the zones around it."""
+
+        zones_around: list[int] = []
+        for (dx, dy) in pathfinding.DIRECTIONS:
+            zone_id: int = self.get_zone(x + dx, y + dy)
+            if zone_id != NO_ZONE and zone_id not in zones_around:
+                zones_around.append(zone_id)
+
+        # A vent entrance is part of the vents, so it connects them to whatever it opens onto. Doors are kept even if
+        # they don't lead anywhere, so every locked door can be found.
+        if door is None:
+            zones_around = list(dict.fromkeys([self.get_zone(x, y)] + zones_around))
+            if len(zones_around) < 2:
+                return
+
+        connection: Connection = Connection(x, y, tuple(zones_around), door)
+        self.connections[(x, y)] = connection
+        for zone_id in connection.zones:
+            self.zones[zone_id].connections.append(connection)
+
+    def _build_regions(self) -> None:
+        """Works out which zones can be reached from each other over the open connections."""
+
+        for through_vents in (False, True):
+            regions: list[int] = [NO_ZONE] * len(self.zones)
+            for zone_ in self.zones:
+                if regions[zone_.id] != NO_ZONE:
+                    continue
+                # Walkers can't start out in the vents, so each vent network is a region of its own for them.
+                if not through_vents and zone_.kind == Zone.Kind.VENTS:
+                    regions[zone_.id] = zone_.id
+                    continue
+
+                regions[zone_.id] = zone_.id
+                frontier: list[int] = [zone_.id]
+                while frontier:
+                    for (neighbour, _) in self.get_neighbours(frontier.pop(), through_vents):
+                        if regions[neighbour] == NO_ZONE:
+                            regions[neighbour] = zone_.id
+                            frontier.append(neighbour)
+
+            self.regions[through_vents] = regions
+
+        self.dirty = False
+
+    def _merge_regions(self, connection: Connection) -> None:
+        """Joins the regions of every zone a newly opened connection leads to."""
+
+        for (through_vents, regions) in self.regions.items():
+            zones_joined: list[int] = [
+                zone_id for zone_id in connection.zones
+                if through_vents or self.zones[zone_id].kind != Zone.Kind.VENTS
+            ]
+            if len(zones_joined) < 2:
+                continue
+
+            region: int = regions[zones_joined[0]]
+            merged: set[int] = {regions[zone_id] for zone_id in zones_joined[1:]} - {region}
+            if merged:
+                self.regions[through_vents] = [region if old in merged else old for old in regions]
+
+    def build(self) -> None:
+        """Labels every cell and connects the zones from scratch, ie: when the floor is built."""
+
+        width: int = self.game_map.width
+        height: int = self.game_map.height
+        costs: list[list[int]] = self.game_map.move_costs
+        entities_ = self.game_map.game_entities
+
+        self.labels = numpy.full((width, height), NO_ZONE, dtype=numpy.int32)
+        self.zones = []
+        self.connections = {}
+
+        doors: dict[tuple[int, int], game_entities.door.Door] = {
+            (door_.x, door_.y): door_ for door_ in entities_.doors
+        }
+        vents: set[tuple[int, int]] = {(vent_.x, vent_.y) for vent_ in entities_.vents}
+        hall_name: str = self.game_map.game_data.tiles["HALL"]["Name"]
+        halls: set[tuple[int, int]] = {
+            (entity_.x, entity_.y) for entity_ in entities_.all
+            if isinstance(entity_, game_entities.tile.Tile) and entity_.name == hall_name
+        }
+
+        walkable: set[tuple[int, int]] = {
+            (x, y) for x in range(width) for y in range(height) if costs[x][y] and (x, y) not in doors
+        }
+        self._label(walkable, {cell: Zone.Kind.CORRIDOR for cell in halls})
+        self._label(vents, {cell: Zone.Kind.VENTS for cell in vents})
+
+        for ((x, y), door_) in doors.items():
+            self._connect(x, y, door_)
+        for vent_ in entities_.vents:
+            if vent_.entrance:
+                self._connect(vent_.x, vent_.y, None)
+
+        self._build_regions()
+
+    def on_cell_changed(self, x: int, y: int) -> None:
+        """Called by the map when something changes at a cell. Only a door locking or unlocking changes the graph."""
+
+        connection: Optional[Connection] = self.connections.get((x, y))
+        if connection is None or connection.is_vent() or connection.open != connection.door.locked:
+            return
+
+        connection.open = not connection.door.locked
+        if connection.open:
+            if not self.dirty:
+                self._merge_regions(connection)
+        else:
+            self.dirty = True
+
+    def get_zone(self, x: int, y: int) -> int:
+        """Returns the id of the zone a cell is in, or NO_ZONE if it's not in one (ie: a wall or door)."""
+
+        if not self.game_map.in_bounds(x, y) or not self.labels.size:
+            return NO_ZONE
+
+        return int(self.labels[x, y])
+
+    def get_connection(self, x: int, y: int) -> Optional[Connection]:
+        """Returns the door or vent entrance at a cell, if there is one."""
+
+        return self.connections.get((x, y))
+
+    def get_neighbours(self, zone_id: int, through_vents: bool = False) -> list[tuple[int, Connection]]:
+        """Returns the zones that can be reached straight from a zone through an open connection, with the connection.
+        Vent entrances are only used if through_vents is True, since only the player crawls through the vents."""
+
+        neighbours: list[tuple[int, Connection]] = []
+        for connection in self.zones[zone_id].connections:
+            if not connection.open or (connection.is_vent() and not through_vents):
+                continue
+
+            for neighbour in connection.zones:
+                if neighbour != zone_id:
+                    neighbours.append((neighbour, connection))
+
+        return neighbours
+
+    def is_reachable(self, zone_a: int, zone_b: int, through_vents: bool = False) -> bool:
+        """Returns whether one zone can be reached from another without going through a locked door."""
+
+        if zone_a == NO_ZONE or zone_b == NO_ZONE:
+            return False
+        if self.dirty:
+            self._build_regions()
+
+        regions: list[int] = self.regions[through_vents]
+        return regions[zone_a] == regions[zone_b]
+
+    def can_reach(self, start: tuple[int, int], goal: tuple[int, int], through_vents: bool = False) -> bool:
+        """Returns whether one cell can be reached from another, ignoring anything standing in the way. A door counts
+        as being in the zones either side of it."""
+
+        starts: tuple[int, ...] = self.get_cell_zones(start[0], start[1])
+        goals: tuple[int, ...] = self.get_cell_zones(goal[0], goal[1])
+
+        return any(self.is_reachable(zone_a, zone_b, through_vents) for zone_a in starts for zone_b in goals)
+
+    def get_cell_zones(self, x: int, y: int) -> tuple[int, ...]:
+        """Returns the zones a cell belongs to: its own, or all the ones around it if it's a connection."""
+
+        connection: Optional[Connection] = self.connections.get((x, y))
+        if connection is not None:
+            return connection.zones
+
+        zone_id: int = self.get_zone(x, y)
+        return (zone_id,) if zone_id != NO_ZONE else ()
+
+    def get_locked_doors(self) -> list[game_entities.door.Door]:
+        """Returns every locked door on the floor."""
+
+        return [
+            connection.door for connection in self.connections.values()
+            if not connection.is_vent() and not connection.open
+        ]